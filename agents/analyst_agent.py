@@ -1,6 +1,6 @@
 from crewai import Agent # Corrected import
 from llm import llm
-from tools.stock_research_tool import get_stock_price
+from tools.stock_research_tool import get_stock_price, get_stock_prices
 
 analyst_agent = Agent(
     role="Financial Market Analyst",
@@ -10,6 +10,6 @@ analyst_agent = Agent(
                  "technical trends, and fundamentals. You specialize in producing well-structured reports that evaluate "
                  "stock performance using live market indicators."),
     llm=llm,
-    tools=[get_stock_price],
+    tools=[get_stock_price, get_stock_prices],
     verbose=True
 )
@@ -1,20 +1,20 @@
 # agents/news_curator_agent.py
 from crewai import Agent # Corrected import
 from llm import llm
-from tools.news_research_tool import get_financial_news, get_sector_news, get_stock_specific_news
+from tools.news_research_tool import get_financial_news, get_sector_news, get_stock_specific_news, get_multi_sector_news
+from typing import Tuple
 from user_profile import UserProfile, ExperienceLevel, RiskAppetite
 
-def create_news_curator_agent(user_profile: UserProfile) -> Agent:
-    """Create a personalized news curator agent based on user profile"""
-    
-    if user_profile.experience_level == ExperienceLevel.BEGINNER:
+def _curator_persona(experience_level: ExperienceLevel) -> Tuple[str, str]:
+    """Role and backstory for the curator; these vary only with experience level."""
+    if experience_level == ExperienceLevel.BEGINNER:
         role = "Beginner-Friendly Financial News Curator"
         backstory = (
             "You are a patient financial educator who specializes in making complex financial news "
             "accessible to new investors. You explain technical terms, provide context, and focus on "
             "educational value while keeping summaries concise and understandable."
         )
-    elif user_profile.experience_level == ExperienceLevel.EXPERT:
+    elif experience_level == ExperienceLevel.EXPERT:
         role = "Expert Financial News Analyst"
         backstory = (
             "You are a seasoned financial analyst who provides sophisticated insights to expert investors. "
@@ -28,23 +28,43 @@ def create_news_curator_agent(user_profile: UserProfile) -> Agent:
             "individual investor needs. You balance technical accuracy with accessibility, "
             "providing relevant insights based on investment goals and risk tolerance."
         )
-    
-    goal = (
-        f"Curate and summarize financial news that aligns with {user_profile.investment_horizon.value} "
-        f"investment strategy, focusing on {', '.join(user_profile.industry_preferences)} sectors, "
-        f"with {user_profile.risk_appetite.value} risk tolerance. Provide 60-80 word summaries that "
-        f"are relevant to {user_profile.experience_level.value} level investors."
-    )
-    
+    return role, backstory
+
+def _curator_agent(role: str, goal: str, backstory: str) -> Agent:
     return Agent(
         role=role,
         goal=goal,
         backstory=backstory,
         llm=llm,
-        tools=[get_financial_news, get_sector_news, get_stock_specific_news],
+        tools=[get_financial_news, get_sector_news, get_multi_sector_news, get_stock_specific_news],
         verbose=True
     )
 
+def create_news_curator_agent(user_profile: UserProfile) -> Agent:
+    """Create a personalized news curator agent based on user profile"""
+    role, backstory = _curator_persona(user_profile.experience_level)
+    goal = (
+        f"Curate and summarize financial news that aligns with {user_profile.investment_horizon.value} "
+        f"investment strategy, focusing on {', '.join(user_profile.industry_preferences)} sectors, "
+        f"with {user_profile.risk_appetite.value} risk tolerance. Provide 60-80 word summaries that "
+        f"are relevant to {user_profile.experience_level.value} level investors."
+    )
+    return _curator_agent(role, goal, backstory)
+
+def create_curator_agent_for_level(experience_level: ExperienceLevel) -> Agent:
+    """Curator shared by every profile with this experience level.
+
+    The profile-specific horizon, sectors and risk tolerance come from the task
+    description instead of the goal, so one agent serves the whole level.
+    """
+    role, backstory = _curator_persona(experience_level)
+    goal = (
+        "Curate and summarize financial news that aligns with the investment horizon, sectors "
+        "and risk tolerance given in each task. Provide 60-80 word summaries that are relevant "
+        f"to {experience_level.value} level investors."
+    )
+    return _curator_agent(role, goal, backstory)
+
 summarizer_agent = Agent(
     role="Financial News Summarizer",
     goal=(
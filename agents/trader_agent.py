@@ -1,6 +1,6 @@
 from crewai import Agent # Corrected import
 from llm import llm
-from tools.stock_research_tool import get_stock_price
+from tools.stock_research_tool import get_stock_price, get_stock_prices
 
 trader_agent = Agent(
     role="Strategic Stock Trader",
@@ -14,6 +14,6 @@ trader_agent = Agent(
         "that optimize returns and reduce risk."
     ),
     llm=llm,
-    tools=[get_stock_price],
+    tools=[get_stock_price, get_stock_prices],
     verbose=True
 )
@@ -9,6 +9,9 @@ class NewsRequest(BaseModel):
     user_id: str
     limit: Optional[int] = 10
 
+class WatchlistRequest(BaseModel):
+    tickers: List[str]
+
 class QuestionnaireResponse(BaseModel):
     frequency: str
     industries: List[str]
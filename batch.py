@@ -0,0 +1,114 @@
+# batch.py
+"""Generate digests for every stored profile, one crew run per cohort.
+
+Profiles with the same cohort_key() produce identical prompts, so a single
+NewsAICrew run is shared by every member of the cohort.
+
+Usage:
+    python batch.py --concurrency 4 --output /tmp/digests.json
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from digest_cache import DigestCache
+from rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from user_profile import UserProfile, UserProfileManager, get_profile_manager
+
+@dataclass
+class BatchReport:
+    profiles: int = 0
+    cohorts: int = 0
+    crew_runs: int = 0
+    failed_cohorts: int = 0
+    elapsed_seconds: float = 0.0
+    digests: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def crew_runs_saved(self) -> int:
+        return self.profiles - self.crew_runs
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'profiles': self.profiles,
+            'cohorts': self.cohorts,
+            'crew_runs': self.crew_runs,
+            'crew_runs_saved': self.crew_runs_saved,
+            'failed_cohorts': self.failed_cohorts,
+            'elapsed_seconds': round(self.elapsed_seconds, 2)
+        }
+
+def group_by_cohort(profiles: Iterable[UserProfile]) -> Dict[str, List[UserProfile]]:
+    cohorts: Dict[str, List[UserProfile]] = {}
+    for profile in profiles:
+        cohorts.setdefault(profile.fingerprint(), []).append(profile)
+    return cohorts
+
+def _in_background(runner: Callable[[UserProfile], str], profile: UserProfile) -> str:
+    # Batch crews queue behind interactive digests for Groq and NewsAPI slots
+    with upstream_priority(PRIORITY_BACKGROUND):
+        return runner(profile)
+
+def _run_crew(profile: UserProfile) -> str:
+    from pipeline import create_digest_generator
+    return str(create_digest_generator(profile).generate_news_digest())
+
+def generate_cohort_digests(profile_manager: UserProfileManager, max_in_flight: int = 4,
+                            runner: Optional[Callable[[UserProfile], str]] = None,
+                            digest_cache=None) -> BatchReport:
+    """Run one crew per cohort with up to max_in_flight cohorts at once and fan results out.
+
+    If a DigestCache is given, each cohort's digest is stored there as well so the
+    /news endpoint serves it without another crew run.
+    """
+    runner = runner or _run_crew
+    cohorts = group_by_cohort(profile_manager.list_profiles())
+    report = BatchReport(profiles=sum(len(members) for members in cohorts.values()), cohorts=len(cohorts))
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="cohort") as executor:
+        futures = {
+            executor.submit(_in_background, runner, members[0]): fingerprint
+            for fingerprint, members in cohorts.items()
+        }
+        for future in as_completed(futures):
+            fingerprint = futures[future]
+            members = cohorts[fingerprint]
+            report.crew_runs += 1
+            try:
+                digest = future.result()
+            except Exception as e:
+                print(f"Error generating digest for cohort {fingerprint}: {e}")
+                report.failed_cohorts += 1
+                for member in members:
+                    report.errors[member.user_id] = str(e)
+                continue
+            if digest_cache is not None:
+                digest_cache.put(members[0], digest)
+            for member in members:
+                report.digests[member.user_id] = digest
+
+    report.elapsed_seconds = time.time() - started
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate news digests for all stored profiles by cohort")
+    parser.add_argument("--storage", help="Profile storage path (default: PROFILE_STORAGE_PATH)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Cohorts processed at once")
+    parser.add_argument("--output", help="Write {user_id: digest} JSON to this file")
+    args = parser.parse_args()
+
+    profile_manager = UserProfileManager(args.storage) if args.storage else get_profile_manager()
+    # Stored digests are served by the API straight from the shared cache
+    report = generate_cohort_digests(profile_manager, max_in_flight=args.concurrency, digest_cache=DigestCache())
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': report.summary(), 'digests': report.digests, 'errors': report.errors}, f, indent=2)
+    print(json.dumps(report.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
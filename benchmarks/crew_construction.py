@@ -0,0 +1,81 @@
+# benchmarks/crew_construction.py
+"""Micro-benchmark of NewsAICrew construction with and without crew_templates.
+
+Usage (from the repo root):
+    python -m benchmarks.crew_construction [--iterations 200] [--json]
+
+Nothing is kicked off, so no Groq or NewsAPI calls are made.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+
+# ChatGroq validates that a key is configured when llm.py is imported
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from crew import NewsAICrew
+from user_profile import (
+    UserProfile, InvestmentFrequency, InvestmentHorizon, RiskAppetite, ExperienceLevel
+)
+
+def sample_profiles(count: int):
+    """A repeating mix of cohorts, like real traffic where most readers share a profile shape."""
+    variants = itertools.product(
+        [["technology", "finance"], ["healthcare"], ["energy", "consumer", "real_estate"]],
+        list(ExperienceLevel),
+        [RiskAppetite.LOW, RiskAppetite.HIGH]
+    )
+    shapes = list(variants)
+    return [
+        UserProfile(
+            user_id=f"bench-{i}",
+            investment_frequency=InvestmentFrequency.DAILY,
+            industry_preferences=industries,
+            investment_horizon=InvestmentHorizon.LONG_TERM,
+            investment_period="5 years",
+            risk_appetite=risk,
+            experience_level=level
+        )
+        for i, (industries, level, risk) in zip(range(count), itertools.cycle(shapes))
+    ]
+
+def time_construction(profiles, use_templates: bool):
+    timings = []
+    for profile in profiles:
+        started = time.perf_counter()
+        NewsAICrew(profile, use_templates=use_templates)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'iterations': len(timings),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(sorted(timings)[int(len(timings) * 0.95) - 1], 3),
+        'total_ms': round(sum(timings), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    profiles = sample_profiles(args.iterations)
+    report = {
+        'per_request': time_construction(profiles, use_templates=False),
+        'templates': time_construction(profiles, use_templates=True)
+    }
+    report['speedup'] = round(report['per_request']['mean_ms'] / report['templates']['mean_ms'], 1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'mode':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode in ('per_request', 'templates'):
+        row = report[mode]
+        print(f"{mode:<14}{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+    print(f"speedup: {report['speedup']}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# benchmarks/e2e.py
+"""Offline end-to-end digest benchmark: tail latency, throughput and memory.
+
+Runs the real crew against local stand-ins (see benchmarks/fakes.py), so no
+NewsAPI, Yahoo or Groq quota is used. Two modes:
+
+    crew  calls generate_news_digest() on NewsAICrew (or, with --digest-mode
+          pipeline, NewsDigestPipeline) directly
+    api   serves main.app with uvicorn and drives POST /news/{user_id} plus
+          job polling over HTTP, so queueing and the digest cache are included
+
+Usage (from the repo root):
+    python -m benchmarks.e2e --mode crew --requests 40 --concurrency 4
+    python -m benchmarks.e2e --mode api --requests 40 --concurrency 8 --profiles 10
+    python -m benchmarks.e2e --mode crew --compare benchmarks/results/e2e-crew-<timestamp>.json
+    python -m benchmarks.e2e --mode crew --curation-mode fanout --compare <single-mode result>
+    python -m benchmarks.e2e --mode crew --digest-mode pipeline --compare <agentic-mode result>
+
+Each run is saved as JSON under --output (default benchmarks/results).
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+def sample_responses(index: int) -> Dict[str, Any]:
+    """Questionnaire answers for the index-th benchmark profile; consecutive indexes differ in cohort."""
+    industries = [["technology", "finance"], ["healthcare"], ["energy", "consumer"],
+                  ["technology", "telecommunications", "media"], ["real_estate", "finance"]]
+    shapes = list(itertools.product(
+        industries, ["daily", "weekly"], ["short_term", "long_term"], ["low", "high"],
+        ["beginner", "intermediate", "advanced"]
+    ))
+    chosen, frequency, horizon, risk, experience = shapes[(index * 7) % len(shapes)]
+    return {"frequency": frequency, "industries": chosen, "horizon": horizon, "period": "5 years",
+            "risk": risk, "experience": experience}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        'completed': len(ms),
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(ms) / elapsed, 3) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(ms, 50), 1),
+            'p95': round(percentile(ms, 95), 1),
+            'p99': round(percentile(ms, 99), 1),
+            'mean': round(sum(ms) / len(ms), 1) if ms else 0.0,
+            'max': round(max(ms), 1) if ms else 0.0
+        }
+    }
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def configure_environment(scratch: str, news_url: str, args):
+    """Point every store and upstream at local stand-ins. Must run before the app modules import."""
+    os.environ.update({
+        "NEWS_API_URL": news_url,
+        "NEWS_API_KEY": "benchmark",
+        "GROQ_API_KEY": "benchmark",
+        "QUOTE_SOURCE": "offline",
+        "PROFILE_STORAGE_PATH": os.path.join(scratch, "profiles.db"),
+        "ARTICLE_STORE_PATH": os.path.join(scratch, "articles.db"),
+        "LLM_CACHE_PATH": os.path.join(scratch, "llm_cache.db"),
+        "LLM_CACHE_ENABLED": "1" if args.llm_cache else "0",
+        "CURATION_MODE": args.curation_mode,
+        "DIGEST_MODE": args.digest_mode,
+        "INGEST_ENABLED": "0"
+    })
+
+def install_fake_llm(args):
+    """Swap llm.llm before any agent module does `from llm import llm`."""
+    import llm
+    from benchmarks.fakes import ScriptedChatModel
+    model = ScriptedChatModel(
+        latency_seconds=args.llm_latency,
+        latency_per_1k_prompt_tokens=args.llm_latency_per_1k,
+        cache=llm.llm_cache if llm.llm_cache else False,
+        callbacks=llm.llm.callbacks
+    )
+    llm.llm = model
+    return model
+
+def run_load(work: Callable[[int], bool], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(index: int):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = work(index)
+        except Exception as e:
+            print(f"Error in benchmark request {index}: {e}")
+            ok = False
+        with lock:
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        list(executor.map(timed, range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def crew_mode(args) -> Dict[str, Any]:
+    from pipeline import create_digest_generator
+    from user_profile import UserProfileManager
+    manager = UserProfileManager()
+    profiles = [manager.create_profile(f"bench-{i}", sample_responses(i)) for i in range(args.profiles)]
+
+    def work(index: int) -> bool:
+        return bool(create_digest_generator(profiles[index % len(profiles)]).generate_news_digest())
+
+    return run_load(work, args.requests, args.concurrency)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def api_mode(args) -> Dict[str, Any]:
+    import httpx
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=_free_port(), log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    base_url = f"http://127.0.0.1:{server.config.port}"
+    try:
+        with httpx.Client(base_url=base_url, timeout=args.timeout) as client:
+            for i in range(args.profiles):
+                client.post("/profile", json={"user_id": f"bench-{i}", "responses": sample_responses(i)}).raise_for_status()
+
+            def work(index: int) -> bool:
+                response = client.post(f"/news/bench-{index % args.profiles}")
+                if response.status_code == 200:
+                    return True
+                job_id = response.json()["job_id"]
+                deadline = time.monotonic() + args.timeout
+                while time.monotonic() < deadline:
+                    result = client.get(f"/news/jobs/{job_id}/result")
+                    if result.status_code == 200:
+                        return True
+                    if result.status_code >= 400:
+                        return False
+                    time.sleep(args.poll_interval)
+                return False
+
+            report = run_load(work, args.requests, args.concurrency)
+            report['cache'] = {
+                name: {key: stats[key] for key in ('hits', 'misses', 'hit_rate') if key in stats}
+                for name, stats in client.get("/cache/stats").json().items() if isinstance(stats, dict)
+            }
+            return report
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+def compare(current: Dict[str, Any], previous_path: str) -> List[Tuple[str, float, float]]:
+    with open(previous_path) as f:
+        previous = json.load(f)
+    rows = [("throughput_rps", previous['throughput_rps'], current['throughput_rps'])]
+    for key in ('p50', 'p95', 'p99'):
+        rows.append((f"latency_ms.{key}", previous['latency_ms'][key], current['latency_ms'][key]))
+    rows.append(("peak_rss_mb", previous['memory_mb']['peak_rss'], current['memory_mb']['peak_rss']))
+    if 'llm_calls_per_request' in previous.get('upstream', {}):
+        rows.append(("llm_calls_per_req", previous['upstream']['llm_calls_per_request'],
+                     current['upstream']['llm_calls_per_request']))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end digest benchmark")
+    parser.add_argument("--mode", choices=("crew", "api"), default="crew")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--profiles", type=int, help="Distinct profiles requests cycle over (default: --requests)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.05, help="Extra seconds per 1000 prompt tokens")
+    parser.add_argument("--news-latency", type=float, default=0.05, help="Seconds per fake NewsAPI request")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the completion cache on (off by default)")
+    parser.add_argument("--curation-mode", choices=("single", "fanout"), default="single",
+                        help="fanout curates each industry in its own concurrent sub-crew")
+    parser.add_argument("--digest-mode", choices=("agentic", "pipeline"), default="agentic",
+                        help="pipeline fetches news in plain Python and makes one summarise-and-rank LLM call")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python heap (slower)")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in api mode")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory for the JSON result")
+    parser.add_argument("--compare", help="Earlier result JSON to diff against")
+    args = parser.parse_args()
+    args.profiles = args.profiles or args.requests
+
+    from benchmarks.fakes import FakeNewsAPIServer
+    news_api = FakeNewsAPIServer(latency_seconds=args.news_latency)
+    news_url = news_api.start()
+    with tempfile.TemporaryDirectory() as scratch:
+        configure_environment(scratch, news_url, args)
+        model = install_fake_llm(args)
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_before = peak_rss_mb()
+        try:
+            report = crew_mode(args) if args.mode == "crew" else api_mode(args)
+        finally:
+            news_api.stop()
+        memory = {'peak_rss': peak_rss_mb(), 'peak_rss_before_load': rss_before}
+        if args.tracemalloc:
+            memory['peak_traced_heap'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            tracemalloc.stop()
+
+    result = {
+        'benchmark': 'e2e',
+        'mode': args.mode,
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'git_commit': git_commit(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        **report,
+        'memory_mb': memory,
+        'upstream': {
+            'newsapi_requests': news_api.requests,
+            'llm_calls': model.calls,
+            'llm_calls_per_request': round(model.calls / args.requests, 2) if args.requests else 0.0,
+            'llm_prompt_tokens': model.prompt_tokens,
+            'llm_completion_tokens': model.completion_tokens
+        }
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"e2e-{args.mode}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps({key: result[key] for key in ('mode', 'completed', 'errors', 'throughput_rps', 'latency_ms', 'memory_mb', 'upstream')}, indent=2))
+    if args.compare:
+        print(f"{'metric':<20}{'previous':>12}{'current':>12}{'change':>10}")
+        for name, before, after in compare(result, args.compare):
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"{name:<20}{before:>12}{after:>12}{change:>10}")
+    print(f"saved {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/fakes.py
+"""Local stand-ins for NewsAPI and Groq used by the offline benchmarks.
+
+FakeNewsAPIServer serves /v2/everything from the canned articles in
+fixtures/newsapi_everything.json over real HTTP, so the news tools exercise
+their whole client, cache and article-store path. ScriptedChatModel replaces
+llm.llm: it answers crewai's ReAct prompts with one tool call and then a
+Final Answer built from the article ids it was shown, after a configurable
+delay that stands in for Groq latency. yfinance is replaced by the quote
+service's offline source (QUOTE_SOURCE=offline).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from user_profile import INDUSTRY_KEYWORDS
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+NEWS_FIXTURE = os.path.join(FIXTURES, "newsapi_everything.json")
+QUOTES_FIXTURE = os.path.join(FIXTURES, "quotes.json")
+
+# Words every tool query carries; matching on them would return the whole fixture
+GENERIC_TERMS = {"and", "or", "not", "stock", "market", "finance", "investment"}
+
+class FakeNewsAPIServer:
+    def __init__(self, fixture_path: str = NEWS_FIXTURE, latency_seconds: float = 0.0):
+        with open(fixture_path) as f:
+            self.articles = json.load(f)["articles"]
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def search(self, query: str, page_size: int) -> List[Dict[str, Any]]:
+        terms = {term for term in re.findall(r"[a-z0-9]+", query.lower()) if term not in GENERIC_TERMS}
+        now = datetime.now(timezone.utc)
+        matches = []
+        for index, article in enumerate(self.articles):
+            words = set(re.findall(r"[a-z0-9]+", f"{article['title']} {article['description']} {article.get('sector', '')}".lower()))
+            if terms and not terms & words:
+                continue
+            article = {key: value for key, value in article.items() if key != "sector"}
+            # Keep the canned articles inside the tools' one-day window
+            article["publishedAt"] = (now - timedelta(minutes=30 * index)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            matches.append(article)
+        return matches[:page_size]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency_seconds:
+                    time.sleep(server.latency_seconds)
+                url = urlparse(self.path)
+                if url.path != "/v2/everything":
+                    self.send_error(404)
+                    return
+                params = parse_qs(url.query)
+                articles = server.search(params.get("q", [""])[0], int(params.get("pageSize", ["20"])[0]))
+                body = json.dumps({"status": "ok", "totalResults": len(articles), "articles": articles}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """Serve on a free localhost port; returns the everything endpoint URL."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-newsapi", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v2/everything"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+def _known_symbols() -> List[str]:
+    with open(QUOTES_FIXTURE) as f:
+        return list(json.load(f))
+
+SYMBOLS = _known_symbols()
+COMPACT_ROW = re.compile(r'\["(a[0-9a-f]{12})","((?:[^"\\]|\\.)*)"')
+BRACKETED_ID = re.compile(r"\[(a[0-9a-f]{12})\]")
+
+def _tool_call(prompt: str) -> Optional[Dict[str, Any]]:
+    sectors = [sector for sector in INDUSTRY_KEYWORDS if sector in prompt.lower()]
+    symbols = [symbol for symbol in SYMBOLS if re.search(rf"\b{re.escape(symbol)}\b", prompt)]
+    # First tool the agent has, in order of preference
+    candidates = [
+        ("Multi-Sector News", {"sectors": ", ".join(sectors[:4]) or "technology", "limit": 5}),
+        ("Market Sector News", {"sector": sectors[0] if sectors else "technology", "limit": 8}),
+        ("Financial News Fetcher", {"keywords": " ".join(sectors[:2]), "limit": 8}),
+        ("Multi-Stock Information Tool", {"stock_symbols": ", ".join(symbols) or "AAPL"}),
+        ("Live Stock Information Tool", {"stock_symbol": symbols[0] if symbols else "AAPL"})
+    ]
+    for name, arguments in candidates:
+        if name in prompt:
+            return {"name": name, "arguments": arguments}
+    return None
+
+def scripted_response(prompt: str) -> str:
+    """One tool call while the agent has tools and no observation yet, then a Final Answer."""
+    if "Action Input" in prompt and "Observation:" not in prompt:
+        call = _tool_call(prompt)
+        if call is not None:
+            return (
+                "Thought: I need current data before answering.\n"
+                f"Action: {call['name']}\nAction Input: {json.dumps(call['arguments'])}"
+            )
+    titles = {article_id: json.loads(f'"{title}"') for article_id, title in COMPACT_ROW.findall(prompt)}
+    article_ids = list(dict.fromkeys(list(titles) + BRACKETED_ID.findall(prompt)))
+    lines = []
+    for article_id in article_ids[:10]:
+        score = 4 + int(hashlib.sha1(article_id.encode()).hexdigest(), 16) % 7
+        lines.append(f"- [{article_id}] {titles.get(article_id, 'Market update')}. Relevance: {score}/10")
+    if not lines:
+        lines.append("- Recommendation: Hold. Price action is within its recent range.")
+    return "Thought: I now know the final answer\nFinal Answer:\n" + "\n".join(lines)
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model with Groq-like latency and usage reporting and no network."""
+
+    model_name: str = "scripted-llama3"
+    latency_seconds: float = 0.0
+    # Extra delay per 1000 prompt tokens, so prompt size shows up in latency like it does on Groq
+    latency_per_1k_prompt_tokens: float = 0.0
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        prompt_tokens = max(1, len(prompt) // 4)
+        time.sleep(self.latency_seconds + prompt_tokens / 1000 * self.latency_per_1k_prompt_tokens)
+        text = scripted_response(prompt)
+        completion_tokens = max(1, len(text) // 4)
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self.model_name}
+        )
@@ -0,0 +1,115 @@
+# benchmarks/import_time.py
+"""Cold-start import cost of the API entry points, broken down per top-level package.
+
+Each run imports the target in a fresh interpreter with `python -X importtime`,
+so nothing is shared between runs. Fails (exit 1) when the median import time
+exceeds --max-ms or when a module that should load lazily shows up at import.
+
+Usage (from the repo root):
+    python -m benchmarks.import_time [--target main] [--runs 5] [--max-ms 1500] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the digest path needs these; importing main must not pull them in
+LAZY_MODULES = ["crew", "llm", "crewai", "crewai_tools", "langchain", "langchain_groq", "yfinance", "pandas"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def _environment(scratch: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    # Keep the benchmark's SQLite files out of the real /tmp stores
+    env["PROFILE_STORAGE_PATH"] = os.path.join(scratch, "profiles.db")
+    env["ARTICLE_STORE_PATH"] = os.path.join(scratch, "articles.db")
+    env["LLM_CACHE_PATH"] = os.path.join(scratch, "llm_cache.db")
+    return env
+
+def measure_once(target: str, env: Dict[str, str]) -> Dict[str, object]:
+    probe = (
+        f"import sys, json; import {target}; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    per_package: Dict[str, int] = defaultdict(int)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        per_package[module.split(".")[0]] += int(self_us)
+        if module == target:
+            total_us = int(cumulative_us)
+    return {
+        'total_ms': total_us / 1000,
+        'per_package_ms': {name: us / 1000 for name, us in per_package.items()},
+        'eager_lazy_modules': json.loads(completed.stdout.strip().splitlines()[-1])
+    }
+
+def build_report(target: str, runs: int, top: int) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as scratch:
+        env = _environment(scratch)
+        samples = [measure_once(target, env) for _ in range(runs)]
+    packages = defaultdict(list)
+    for sample in samples:
+        for name, ms in sample['per_package_ms'].items():
+            packages[name].append(ms)
+    breakdown = sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        'target': target,
+        'runs': runs,
+        'median_ms': round(statistics.median(sample['total_ms'] for sample in samples), 1),
+        'max_ms': round(max(sample['total_ms'] for sample in samples), 1),
+        'top_packages_ms': [{'package': name, 'self_ms': round(ms, 1)} for name, ms in breakdown[:top]],
+        'eager_lazy_modules': samples[-1]['eager_lazy_modules']
+    }
+
+def check(report: Dict[str, object], max_ms: float) -> List[str]:
+    failures = []
+    if report['median_ms'] > max_ms:
+        failures.append(f"import {report['target']} took {report['median_ms']} ms (budget {max_ms} ms)")
+    if report['eager_lazy_modules']:
+        failures.append(f"import {report['target']} loaded {', '.join(report['eager_lazy_modules'])} eagerly")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="main", help="Module to import (main or api.main)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Packages shown in the breakdown")
+    parser.add_argument("--max-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")),
+                        help="Regression threshold for the median import time")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    report = build_report(args.target, args.runs, args.top)
+    failures = check(report, args.max_ms)
+    if args.json:
+        print(json.dumps({**report, 'failures': failures}, indent=2))
+    else:
+        print(f"import {report['target']}: median {report['median_ms']} ms, max {report['max_ms']} ms over {report['runs']} runs")
+        for row in report['top_packages_ms']:
+            print(f"  {row['package']:<28}{row['self_ms']:>10} ms")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/tool_output_tokens.py
+"""Compare token cost of the legacy repr tool output with the compact format.
+
+Usage (from the repo root):
+    python -m benchmarks.tool_output_tokens [--fixture PATH] [--json]
+
+The compact+dedup row also collapses syndicated near-duplicates (tools/dedup.py).
+
+Token counts use tiktoken's cl100k_base encoding as a proxy for the Llama 3
+tokenizer; the ratio between formats is what matters.
+"""
+import argparse
+import json
+import os
+
+import tiktoken
+
+from tools.article_format import compact_articles
+from tools.dedup import NearDuplicateDetector
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "newsapi_everything.json")
+
+def load_articles(path: str):
+    with open(path) as f:
+        data = json.load(f)
+    # Same shape get_financial_news produced before the compact format
+    return [
+        {
+            'title': article['title'], 'description': article['description'],
+            'url': article['url'], 'published_at': article['publishedAt'],
+            'source': article.get('source', {}).get('name', 'Unknown')
+        }
+        for article in data.get('articles', [])
+        if article.get('title') and article.get('description')
+    ]
+
+def build_report(articles, description_lengths=(80, 160, 400)):
+    encoding = tiktoken.get_encoding("cl100k_base")
+    legacy = str(articles)
+    legacy_tokens = len(encoding.encode(legacy))
+    report = {
+        'articles': len(articles),
+        'legacy_repr': {'chars': len(legacy), 'tokens': legacy_tokens},
+        'compact': {}
+    }
+    for length in description_lengths:
+        compact = compact_articles(articles, description_chars=length)
+        tokens = len(encoding.encode(compact))
+        report['compact'][str(length)] = {
+            'chars': len(compact),
+            'tokens': tokens,
+            'tokens_saved_pct': round(100.0 * (legacy_tokens - tokens) / legacy_tokens, 1)
+        }
+    deduped = NearDuplicateDetector().dedupe(articles)
+    compact = compact_articles(deduped)
+    tokens = len(encoding.encode(compact))
+    report['compact_dedup'] = {
+        'articles': len(deduped),
+        'chars': len(compact),
+        'tokens': tokens,
+        'tokens_saved_pct': round(100.0 * (legacy_tokens - tokens) / legacy_tokens, 1)
+    }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    report = build_report(load_articles(args.fixture))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    legacy = report['legacy_repr']
+    print(f"{report['articles']} articles")
+    print(f"{'format':<24}{'chars':>8}{'tokens':>8}{'saved':>8}")
+    print(f"{'legacy repr':<24}{legacy['chars']:>8}{legacy['tokens']:>8}{'-':>8}")
+    for length, row in report['compact'].items():
+        label = f"compact (desc {length})"
+        print(f"{label:<24}{row['chars']:>8}{row['tokens']:>8}{row['tokens_saved_pct']:>7}%")
+    row = report['compact_dedup']
+    label = f"compact+dedup ({row['articles']})"
+    print(f"{label:<24}{row['chars']:>8}{row['tokens']:>8}{row['tokens_saved_pct']:>7}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# benchmarks/workers.py
+"""Multi-worker load test: cached digest throughput as API worker processes are added.
+
+For each worker count, starts `python main.py` with WEB_CONCURRENCY=<n> on stores
+in a scratch directory, creates profiles over HTTP and writes their digests
+straight into the shared DigestStore. --clients client processes then send
+POST /news/{user_id} for --duration seconds. Every request is a digest cache
+hit, so the load is CPU-bound in the app rather than waiting on upstreams, and
+throughput should grow with workers up to the number of cores.
+
+It also checks cross-worker consistency over fresh connections, which uvicorn
+spreads across its workers:
+    - a profile created on one connection is found on the next (no 404s)
+    - a digest job submitted on one connection is reported by the next
+
+Usage (from the repo root):
+    python -m benchmarks.workers --workers 1,2,4 --clients 8 --duration 10
+
+Each run is saved as JSON under --output (default benchmarks/results).
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.e2e import RESULTS_DIR, ROOT, _free_port, git_commit, sample_responses, summarize
+
+def _request(port: int, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+    """One request on a new connection, so consecutive calls may land on different workers."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        headers = {"Connection": "close"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        try:
+            return response.status, json.loads(data or b"{}")
+        except ValueError:
+            return response.status, {}
+    finally:
+        conn.close()
+
+def server_environment(scratch: str, port: int, workers: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "PROFILE_STORAGE_PATH": os.path.join(scratch, "profiles.db"),
+        "DIGEST_STORE_PATH": os.path.join(scratch, "digests.db"),
+        "DIGEST_JOB_STORE_PATH": os.path.join(scratch, "digest_jobs.db"),
+        "ARTICLE_STORE_PATH": os.path.join(scratch, "articles.db"),
+        "LLM_CACHE_PATH": os.path.join(scratch, "llm_cache.db"),
+        "SUMMARY_CACHE_PATH": os.path.join(scratch, "summaries.db"),
+        "HOST_LOCK_DIR": scratch,
+        # Digest jobs from the consistency check fail fast instead of reaching real upstreams
+        "DIGEST_MODE": "pipeline",
+        "NEWS_API_URL": "http://127.0.0.1:9",
+        "NEWS_API_KEY": "benchmark",
+        "GROQ_API_KEY": "benchmark",
+        "QUOTE_SOURCE": "offline",
+        "INGEST_ENABLED": "0",
+        "DIGEST_PRECOMPUTE_ENABLED": "0"
+    })
+    return env
+
+def start_server(env: Dict[str, str], port: int, timeout: float = 60) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if _request(port, "GET", "/")[0] == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not start in time")
+
+def seed(port: int, digest_store_path: str, profiles: int) -> List[str]:
+    """Create profiles over HTTP and write a digest for each cohort into the shared store."""
+    from digest_cache import DigestCache
+    from user_profile import UserProfile
+
+    digests = DigestCache(path=digest_store_path)
+    users = []
+    for i in range(profiles):
+        user_id = f"bench-{i}"
+        status, body = _request(port, "POST", "/profile", {"user_id": user_id, "responses": sample_responses(i)})
+        if status != 200:
+            raise RuntimeError(f"Could not create profile {user_id}: {status} {body}")
+        profile = UserProfile.from_dict(body["profile"])
+        digests.put(profile, f"Benchmark digest for {profile.fingerprint()}\n" + "Market update. " * 200)
+        users.append(user_id)
+    return users
+
+def client(port: int, users: List[str], start_at: float, duration: float) -> Tuple[List[float], int]:
+    """Runs in its own process: keep-alive POST /news requests until the shared deadline."""
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = start_at + duration
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors, index = [], 0, os.getpid()
+    while time.time() < deadline:
+        user_id = users[index % len(users)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            conn.request("POST", f"/news/{user_id}")
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    conn.close()
+    return latencies, errors
+
+def check_consistency(port: int, checks: int, offset: int) -> Dict[str, int]:
+    missing_profiles = missing_jobs = jobs_checked = 0
+    for i in range(checks):
+        user_id = f"consistency-{i}"
+        _request(port, "POST", "/profile", {"user_id": user_id, "responses": sample_responses(offset + i)})
+        if _request(port, "GET", f"/profile/{user_id}")[0] == 404:
+            missing_profiles += 1
+        status, body = _request(port, "POST", f"/news/{user_id}")
+        job_id = body.get("job_id") if status == 202 else None
+        if job_id:
+            jobs_checked += 1
+            if _request(port, "GET", f"/news/jobs/{job_id}")[0] == 404:
+                missing_jobs += 1
+    return {'checks': checks, 'profile_404s': missing_profiles, 'jobs_checked': jobs_checked, 'job_404s': missing_jobs}
+
+def run_workers(workers: int, args) -> Dict[str, Any]:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as scratch:
+        env = server_environment(scratch, port, workers)
+        server = start_server(env, port)
+        try:
+            users = seed(port, env["DIGEST_STORE_PATH"], args.profiles)
+            start_at = time.time() + 1.0
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.starmap(client, [(port, users, start_at, args.duration)] * args.clients)
+            latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+            errors = sum(client_errors for _, client_errors in results)
+            report = summarize(latencies, errors, args.duration)
+            report['consistency'] = check_consistency(port, args.consistency_checks, args.profiles)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return {'workers': workers, **report}
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker API load test on cached digests")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated WEB_CONCURRENCY values to compare")
+    parser.add_argument("--clients", type=int, default=8, help="Client processes sending requests")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--profiles", type=int, default=50, help="Profiles (and cached digests) requests cycle over")
+    parser.add_argument("--consistency-checks", type=int, default=20)
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory for the JSON result")
+    args = parser.parse_args()
+
+    runs = []
+    for workers in (int(value) for value in args.workers.split(",")):
+        run = run_workers(workers, args)
+        runs.append(run)
+        print(json.dumps(run))
+
+    result = {
+        'benchmark': 'workers',
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'git_commit': git_commit(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'runs': runs
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"workers-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    baseline = runs[0]['throughput_rps'] or 1.0
+    print(f"{'workers':>8}{'rps':>10}{'speedup':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'404s':>6}")
+    for run in runs:
+        consistency = run['consistency']
+        print(f"{run['workers']:>8}{run['throughput_rps']:>10}{run['throughput_rps'] / baseline:>8.2f}x"
+              f"{run['latency_ms']['p50']:>9}{run['latency_ms']['p99']:>9}{run['errors']:>8}"
+              f"{consistency['profile_404s'] + consistency['job_404s']:>6}")
+    print(f"saved {path}")
+
+if __name__ == "__main__":
+    main()
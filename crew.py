@@ -1,62 +1,260 @@
 # crew.py
-from crewai import Crew
+import contextvars
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Callable, List, Optional
+from crewai import Crew, Task
 from user_profile import UserProfile
+from tools.article_format import article_registry
+from crew_templates import crew_templates
+from metrics import complete_stage, track_crew
+from llm_cache import llm_cache_bypass
 from tasks.news_curation_task import (
     create_news_curation_task,
     create_summarization_task,
     create_relevance_scoring_task
 )
-from agents.news_curator_agent import (
-    create_news_curator_agent,
-    summarizer_agent,
-    relevance_scorer_agent
-)
+from agents.news_curator_agent import create_news_curator_agent
+
+# "llm" runs the relevance_scorer_agent task; "local" ranks with relevance.py instead
+RELEVANCE_MODES = ("llm", "local")
+
+# "llm" runs the summarizer_agent task per user; "cached" assembles shared per-article summaries (summary_cache.py).
+# Cached summaries are profile-neutral: they carry no per-profile takeaways, action items or risk notes
+SUMMARY_MODES = ("llm", "cached")
+
+# "single" curates every industry in one agent loop; "fanout" runs one curation sub-crew per industry at once
+CURATION_MODES = ("single", "fanout")
+
+# Per-industry target in fanout mode; the merge trims the union to CURATION_MAX_ARTICLES
+FANOUT_ARTICLE_COUNT = "4-6"
+
+# Names reported to on_task_complete, in crew order
+STAGES = ("curation", "summaries", "ranking")
+
+# Stages whose completions depend on live data and skip the LLM completion cache
+LIVE_STAGES = ("curation",)
+
+def task_output_text(output) -> str:
+    """Raw text of a crewai TaskOutput across crewai versions."""
+    return getattr(output, "raw", None) or getattr(output, "raw_output", None) or str(output)
+
+def merge_curations(outputs: List[str], max_articles: int) -> str:
+    """Combine per-industry curation outputs, dropping repeated and near-duplicate articles.
+
+    Industries take turns so each keeps its top picks; the result is cut at max_articles.
+    Outputs without article ids are concatenated unchanged.
+    """
+    from relevance import split_by_article
+    from tools.dedup import near_duplicates
+    per_industry = [split_by_article(output)[1] for output in outputs]
+    blocks, seen = [], set()
+    for turn in itertools.zip_longest(*per_industry):
+        for block in turn:
+            if block is not None and block[0] not in seen:
+                seen.add(block[0])
+                blocks.append(block)
+    if not blocks:
+        return "\n\n".join(outputs)
+    articles = [article_registry.get_article(article_id) or {'id': article_id} for article_id, _ in blocks]
+    # Clusters come back ordered by first member, so each keeps the earliest-ranked copy
+    kept = [members[0] for members in near_duplicates.clusters(articles)]
+    return "\n".join(blocks[index][1].rstrip("\n") + "\n" for index in kept[:max_articles])
 
 class NewsAICrew:
-    def __init__(self, user_profile: UserProfile):
+    def __init__(self, user_profile: UserProfile, relevance_mode: Optional[str] = None,
+                 on_task_complete: Optional[Callable[[str, str], None]] = None,
+                 use_templates: Optional[bool] = None, summary_mode: Optional[str] = None,
+                 curation_mode: Optional[str] = None, fanout: Optional[int] = None):
+        """on_task_complete(stage, output) is called as each stage in STAGES finishes.
+
+        use_templates (default CREW_TEMPLATES=1) reuses agents and task templates from
+        crew_templates instead of building them for every request. In fanout curation
+        mode (CURATION_MODE) up to fanout (CURATION_FANOUT) industries are curated at once.
+        """
+        self.on_task_complete = on_task_complete
+        if use_templates is None:
+            use_templates = os.getenv("CREW_TEMPLATES", "1") == "1"
+        self.use_templates = use_templates
+        self.relevance_mode = relevance_mode or os.getenv("RELEVANCE_MODE", "llm")
+        if self.relevance_mode not in RELEVANCE_MODES:
+            raise ValueError(f"Unknown relevance mode {self.relevance_mode!r}, expected one of {RELEVANCE_MODES}")
+        self.summary_mode = summary_mode or os.getenv("SUMMARY_MODE", "llm")
+        if self.summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode {self.summary_mode!r}, expected one of {SUMMARY_MODES}")
+        self.curation_mode = curation_mode or os.getenv("CURATION_MODE", "single")
+        if self.curation_mode not in CURATION_MODES:
+            raise ValueError(f"Unknown curation mode {self.curation_mode!r}, expected one of {CURATION_MODES}")
+        self.fanout = fanout or int(os.getenv("CURATION_FANOUT", "4"))
+        self.max_articles = int(os.getenv("CURATION_MAX_ARTICLES", "12"))
+        self._build(user_profile)
+    
+    def _curation_task(self, profile: UserProfile, article_count: str = "8-12") -> Task:
+        if self.use_templates:
+            return crew_templates.curation_task(profile, article_count)
+        return create_news_curation_task(profile, agent=create_news_curator_agent(profile), article_count=article_count)
+    
+    def _build(self, user_profile: UserProfile):
         self.user_profile = user_profile
-        self.curator_agent = create_news_curator_agent(user_profile)
+        if self.use_templates:
+            build_summarization_task = crew_templates.summarization_task
+            build_relevance_task = crew_templates.relevance_task
+        else:
+            build_summarization_task = create_summarization_task
+            build_relevance_task = create_relevance_scoring_task
+        
+        self.relevance_task = build_relevance_task(user_profile) if self.relevance_mode == "llm" else None
+        self.summarization_task = build_summarization_task(user_profile) if self.summary_mode == "llm" else None
+        
+        if self.curation_mode == "fanout":
+            # Curation sub-crews are built per run; later stages start once their output is merged
+            self.curation_task = None
+            self.curator_agent = None
+            self.crew = None
+            return
+        
+        self.curation_task = self._curation_task(user_profile)
+        self.curator_agent = self.curation_task.agent
+        if self.summary_mode == "cached":
+            # Summaries come from summary_cache between curation and ranking, so the
+            # crew only curates; ranking runs in its own crew once summaries exist
+            self.curation_task.callback = self._task_callback("curation")
+            self.crew = Crew(agents=[self.curator_agent], tasks=[self.curation_task], verbose=True)
+            return
         
-        # Create tasks
-        self.curation_task = create_news_curation_task(user_profile)
-        self.summarization_task = create_summarization_task(user_profile)
-        self.relevance_task = create_relevance_scoring_task(user_profile)
+        tasks = [self.curation_task, self.summarization_task]
+        if self.relevance_task is not None:
+            tasks.append(self.relevance_task)
+        # Templated tasks carry a per-run copy of their agent; the crew must use those copies
+        agents = [task.agent for task in tasks]
+        # Always attached: the callback also closes the stage's timing in metrics
+        for stage, task in zip(STAGES, tasks):
+            task.callback = self._task_callback(stage)
         
         # Create crew
         self.crew = Crew(
-            agents=[self.curator_agent, summarizer_agent, relevance_scorer_agent],
-            tasks=[self.curation_task, self.summarization_task, self.relevance_task],
+            agents=agents,
+            tasks=tasks,
             verbose=True
         )
     
+    def _task_callback(self, stage: str) -> Callable:
+        def callback(output):
+            self._emit(stage, task_output_text(output))
+        return callback
+    
+    def _emit(self, stage: str, text: str):
+        complete_stage(stage)
+        if self.on_task_complete:
+            self.on_task_complete(stage, article_registry.resolve(text))
+    
+    @staticmethod
+    def _with_input(task: Task, heading: str, text: str) -> Task:
+        """Copy of task with an earlier stage's output in its description, for stages run in a separate crew."""
+        return task.model_copy(update={"description": f"{task.description}\n\n{heading}:\n{text}"})
+    
+    def _curate_industry(self, profile: UserProfile) -> str:
+        task = self._curation_task(profile, FANOUT_ARTICLE_COUNT)
+        return str(Crew(agents=[task.agent], tasks=[task], verbose=True).kickoff())
+    
+    def _fan_out_curation(self) -> str:
+        industries = list(dict.fromkeys(self.user_profile.industry_preferences))
+        profiles = [replace(self.user_profile, industry_preferences=[industry]) for industry in industries]
+        profiles = profiles or [self.user_profile]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.fanout, len(profiles))),
+                                thread_name_prefix="curation") as executor:
+            # Each worker runs in a copy of this context, keeping stage metrics and upstream priority
+            futures = [executor.submit(contextvars.copy_context().run, self._curate_industry, profile)
+                       for profile in profiles]
+        outputs, errors = [], []
+        for profile, future in zip(profiles, futures):
+            try:
+                outputs.append(future.result())
+            except Exception as e:
+                print(f"Error curating {', '.join(profile.industry_preferences)} news: {e}")
+                errors.append(e)
+        if not outputs:
+            raise errors[0]
+        return merge_curations(outputs, self.max_articles)
+    
+    def _summarize_and_rank(self, curated: str) -> str:
+        tasks = [self._with_input(self.summarization_task, "Curated articles", curated)]
+        if self.relevance_task is not None:
+            tasks.append(self.relevance_task)
+        for stage, task in zip(STAGES[1:], tasks):
+            task.callback = self._task_callback(stage)
+        return str(Crew(agents=[task.agent for task in tasks], tasks=tasks, verbose=True).kickoff())
+    
+    def _cached_summaries(self, curated: str) -> str:
+        from summary_cache import article_ids_in, assemble_summaries, get_summary_cache, summary_style
+        article_ids = [article_id for article_id in article_ids_in(curated) if article_registry.get_article(article_id)]
+        if not article_ids:
+            # Nothing to look up (e.g. the curator answered without ids); pass the curation through
+            return curated
+        articles = [article_registry.get_article(article_id) for article_id in article_ids]
+        summaries = get_summary_cache().summaries_for(articles, summary_style(self.user_profile.experience_level))
+        return assemble_summaries(article_ids, summaries)
+    
+    def _rank_with_llm(self, summaries: str) -> str:
+        task = self._with_input(self.relevance_task, "Article summaries", summaries)
+        task.callback = self._task_callback("ranking")
+        return str(Crew(agents=[task.agent], tasks=[task], verbose=True).kickoff())
+    
     def generate_news_digest(self) -> str:
         """Generate personalized news digest for the user"""
-        result = self.crew.kickoff()
-        return result
+        # Curation researches breaking news through live tools; later stages work from its output and stay cached
+        with track_crew("news", STAGES) as tracker, llm_cache_bypass(stages=LIVE_STAGES):
+            if self.curation_mode == "fanout":
+                result = self._fan_out_curation()
+                self._emit("curation", result)
+                if self.summary_mode == "llm":
+                    result = self._summarize_and_rank(result)
+            else:
+                result = str(self.crew.kickoff())
+            if self.summary_mode == "cached":
+                result = self._cached_summaries(result)
+                self._emit("summaries", result)
+                if self.relevance_mode == "llm":
+                    result = self._rank_with_llm(result)
+            if self.relevance_mode == "local":
+                from relevance import rank_summaries
+                result = rank_summaries(result, self.user_profile)
+                tracker.complete("ranking")
+        if self.relevance_mode == "local" and self.on_task_complete:
+            self.on_task_complete("ranking", article_registry.resolve(result))
+        # Tools hand the LLM short article ids instead of URLs; put the links back
+        return article_registry.resolve(result)
     
     def update_user_profile(self, new_profile: UserProfile):
         """Update user profile and recreate agents/tasks"""
-        self.user_profile = new_profile
-        self.curator_agent = create_news_curator_agent(new_profile)
-        self.curation_task = create_news_curation_task(new_profile)
-        self.summarization_task = create_summarization_task(new_profile)
-        self.relevance_task = create_relevance_scoring_task(new_profile)
-        
-        # Recreate crew with updated components
-        self.crew = Crew(
-            agents=[self.curator_agent, summarizer_agent, relevance_scorer_agent],
-            tasks=[self.curation_task, self.summarization_task, self.relevance_task],
-            verbose=True
-        )
+        self._build(new_profile)
+
+# Legacy crew for backward compatibility with existing stock analysis.
+# Built on first access (crew.stock_crew) so importing this module for the news
+# crew does not construct the analyst/trader agents or load yfinance.
+_stock_crew: Optional[Crew] = None
+_stock_crew_lock = threading.Lock()
+
+def get_stock_crew() -> Crew:
+    global _stock_crew
+    with _stock_crew_lock:
+        if _stock_crew is None:
+            from agents.analyst_agent import analyst_agent
+            from agents.trader_agent import trader_agent
+            from tasks.analyse_task import get_stock_analysis
+            from tasks.trade_task import trade_decision
+
+            _stock_crew = Crew(
+                agents=[analyst_agent, trader_agent],
+                tasks=[get_stock_analysis, trade_decision],
+                verbose=True
+            )
+        return _stock_crew
 
-# Legacy crew for backward compatibility with existing stock analysis
-from agents.analyst_agent import analyst_agent
-from agents.trader_agent import trader_agent
-from tasks.analyse_task import get_stock_analysis
-from tasks.trade_task import trade_decision
-
-stock_crew = Crew(
-    agents=[analyst_agent, trader_agent],
-    tasks=[get_stock_analysis, trade_decision],
-    verbose=True
-)
\ No newline at end of file
+def __getattr__(name: str):
+    if name == "stock_crew":
+        return get_stock_crew()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,113 @@
+# crew_templates.py
+"""Build crew agents and tasks once per variant and reuse them across requests.
+
+Curator agents vary only with ExperienceLevel and are shared, like the
+module-level summarizer and relevance agents already are. Task text depends
+on a few enums plus the industry list, so one template Task is built per
+variant; each request gets a shallow copy, which skips pydantic validation
+and keeps per-run state (output, callback) off the template. The copy is bound
+to a shallow copy of the template's agent with crewai's per-run fields reset,
+so concurrent kickoffs share the LLM, prompts and tools but not executors.
+"""
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from crewai import Agent, Task
+
+from agents.news_curator_agent import create_curator_agent_for_level
+from tasks.news_curation_task import (
+    create_news_curation_task,
+    create_summarization_task,
+    create_relevance_scoring_task
+)
+from user_profile import UserProfile, ExperienceLevel
+
+# Agent fields crewai fills in during a kickoff (executor, owning crew, tool and cache
+# handlers, tool results); each per-run agent copy starts them fresh
+AGENT_RUNTIME_FIELDS: Dict[str, Callable[[], object]] = {
+    "agent_executor": lambda: None,
+    "crew": lambda: None,
+    "tools_handler": lambda: None,
+    "cache_handler": lambda: None,
+    "tools_results": list
+}
+
+def runtime_copy(agent: Agent) -> Agent:
+    """Shallow copy of agent for one run: no validation, nothing rebuilt, runtime fields reset."""
+    fields = type(agent).model_fields
+    update = {name: factory() for name, factory in AGENT_RUNTIME_FIELDS.items() if name in fields}
+    if "tools" in fields:
+        # Crews may append delegation tools to an agent's list; keep that off the shared one
+        update["tools"] = list(agent.tools or [])
+    return agent.model_copy(update=update)
+
+class CrewTemplateRegistry:
+    def __init__(self, max_task_templates: int = 1024):
+        self.max_task_templates = max_task_templates
+        self._agents: Dict[ExperienceLevel, Agent] = {}
+        self._tasks: "OrderedDict[Hashable, Task]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.template_hits = 0
+        self.template_misses = 0
+
+    def curator_agent(self, experience_level: ExperienceLevel) -> Agent:
+        agent = self._agents.get(experience_level)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(experience_level)
+                if agent is None:
+                    agent = self._agents[experience_level] = create_curator_agent_for_level(experience_level)
+        return agent
+
+    def _template(self, key: Hashable, build: Callable[[], Task]) -> Task:
+        with self._lock:
+            template = self._tasks.get(key)
+            if template is not None:
+                self._tasks.move_to_end(key)
+                self.template_hits += 1
+                return template
+            self.template_misses += 1
+        template = build()
+        with self._lock:
+            self._tasks[key] = template
+            while len(self._tasks) > self.max_task_templates:
+                self._tasks.popitem(last=False)
+        return template
+
+    @staticmethod
+    def _bind(template: Task) -> Task:
+        update = {"id": uuid.uuid4()} if "id" in type(template).model_fields else {}
+        if template.agent is not None:
+            # crewai keeps per-run executor, crew and tool state on the agent, so concurrent
+            # kickoffs each need their own; Agent.copy() would re-validate and rebuild it
+            update["agent"] = runtime_copy(template.agent)
+        return template.model_copy(update=update)
+
+    def curation_task(self, profile: UserProfile, article_count: str = "8-12") -> Task:
+        key = ("curation", tuple(profile.industry_preferences), profile.investment_frequency,
+               profile.investment_horizon, profile.risk_appetite, profile.experience_level, article_count)
+        agent = self.curator_agent(profile.experience_level)
+        return self._bind(self._template(
+            key, lambda: create_news_curation_task(profile, agent=agent, article_count=article_count)))
+
+    def summarization_task(self, profile: UserProfile) -> Task:
+        key = ("summarization", profile.experience_level, profile.investment_horizon, profile.risk_appetite)
+        return self._bind(self._template(key, lambda: create_summarization_task(profile)))
+
+    def relevance_task(self, profile: UserProfile) -> Task:
+        key = ("relevance",) + profile.cohort_key()
+        return self._bind(self._template(key, lambda: create_relevance_scoring_task(profile)))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'agents': len(self._agents),
+                'task_templates': len(self._tasks),
+                'template_hits': self.template_hits,
+                'template_misses': self.template_misses
+            }
+
+crew_templates = CrewTemplateRegistry(int(os.getenv("CREW_TEMPLATE_CACHE_SIZE", "1024")))
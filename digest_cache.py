@@ -0,0 +1,232 @@
+# digest_cache.py
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from user_profile import UserProfile, InvestmentFrequency
+
+# How long a digest stays fresh, driven by how often the reader trades
+DIGEST_TTL_SECONDS = {
+    InvestmentFrequency.DAILY: 15 * 60,
+    InvestmentFrequency.WEEKLY: 60 * 60,
+    InvestmentFrequency.MONTHLY: 6 * 60 * 60,
+    InvestmentFrequency.QUARTERLY: 12 * 60 * 60,
+    InvestmentFrequency.YEARLY: 24 * 60 * 60
+}
+
+@dataclass
+class CachedDigest:
+    fingerprint: str
+    digest: str
+    created_at: float
+    expires_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.expires_at <= time.time()
+
+class DigestStore:
+    """SQLite copy of the digest cache, so digests survive restarts and are shared between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS digests (
+                       fingerprint TEXT PRIMARY KEY,
+                       digest TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       expires_at REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_digests_expires ON digests(expires_at)")
+            # Invalidations in order, so other processes can drop their in-memory copies
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS digest_invalidations (
+                       seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                       fingerprint TEXT NOT NULL,
+                       invalidated_at REAL NOT NULL
+                   )"""
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, fingerprint: str) -> Optional[CachedDigest]:
+        row = self._connection().execute(
+            "SELECT fingerprint, digest, created_at, expires_at FROM digests WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        return CachedDigest(*row) if row else None
+
+    def put(self, entry: CachedDigest):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests (fingerprint, digest, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (entry.fingerprint, entry.digest, entry.created_at, entry.expires_at)
+            )
+
+    def delete(self, fingerprint: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM digests WHERE fingerprint = ?", (fingerprint,))
+            conn.execute(
+                "INSERT INTO digest_invalidations (fingerprint, invalidated_at) VALUES (?, ?)",
+                (fingerprint, time.time())
+            )
+
+    def last_invalidation(self) -> int:
+        return self._connection().execute("SELECT COALESCE(MAX(seq), 0) FROM digest_invalidations").fetchone()[0]
+
+    def invalidations_since(self, seq: int) -> List[Tuple[int, str]]:
+        return self._connection().execute(
+            "SELECT seq, fingerprint FROM digest_invalidations WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+
+    def prune(self, expired_before: float) -> int:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM digest_invalidations WHERE invalidated_at < ?", (time.time() - 24 * 3600,))
+            return conn.execute("DELETE FROM digests WHERE expires_at < ?", (expired_before,)).rowcount
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+class DigestCache:
+    """LRU cache of generated digests keyed by UserProfile.fingerprint().
+
+    Backed by a DigestStore (DIGEST_STORE_PATH; empty disables it) so precomputed
+    digests outlive the process and are shared between API workers. Expired digests
+    are kept for max_stale_seconds so readers can be given the old digest while a
+    refresh runs. Invalidations made by any process reach this one's memory within
+    DIGEST_INVALIDATION_POLL_SECONDS.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None,
+                 max_stale_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("DIGEST_CACHE_SIZE", "2048"))
+        if max_stale_seconds is None:
+            max_stale_seconds = float(os.getenv("DIGEST_MAX_STALE_SECONDS", str(7 * 24 * 3600)))
+        self.max_stale_seconds = max_stale_seconds
+        if path is None:
+            path = os.getenv("DIGEST_STORE_PATH", "/tmp/news_digests.db")
+        self.store = DigestStore(path) if path else None
+        self._entries: "OrderedDict[str, CachedDigest]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidation_poll_seconds = float(os.getenv("DIGEST_INVALIDATION_POLL_SECONDS", "1"))
+        self._invalidation_seq = 0
+        self._invalidations_checked = 0.0
+        if self.store is not None:
+            self.store.prune(time.time() - self.max_stale_seconds)
+            self._invalidation_seq = self.store.last_invalidation()
+
+    @staticmethod
+    def ttl_for(profile: UserProfile) -> int:
+        return DIGEST_TTL_SECONDS.get(profile.investment_frequency, 60 * 60)
+
+    def _remember(self, entry: CachedDigest):
+        # Caller holds self._lock
+        self._entries[entry.fingerprint] = entry
+        self._entries.move_to_end(entry.fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _apply_invalidations(self):
+        # Drop memory entries other processes invalidated, at most once per poll interval
+        now = time.monotonic()
+        if self.store is None or now - self._invalidations_checked < self.invalidation_poll_seconds:
+            return
+        self._invalidations_checked = now
+        invalidations = self.store.invalidations_since(self._invalidation_seq)
+        if not invalidations:
+            return
+        with self._lock:
+            for seq, fingerprint in invalidations:
+                self._entries.pop(fingerprint, None)
+                self._invalidation_seq = max(self._invalidation_seq, seq)
+
+    def peek(self, profile: UserProfile) -> Optional[CachedDigest]:
+        """Newest digest for the profile's cohort, fresh or stale, without touching hit counters."""
+        self._apply_invalidations()
+        key = profile.fingerprint()
+        with self._lock:
+            entry = self._entries.get(key)
+        if (entry is None or entry.is_stale) and self.store is not None:
+            # Another process (or the precompute scheduler) may have written a newer one
+            stored = self.store.get(key)
+            if stored is not None and (entry is None or stored.created_at > entry.created_at):
+                entry = stored
+                with self._lock:
+                    self._remember(entry)
+        if entry is not None and entry.expires_at + self.max_stale_seconds <= time.time():
+            return None
+        return entry
+
+    def get(self, profile: UserProfile, allow_stale: bool = False) -> Optional[CachedDigest]:
+        """Fresh digest for the profile, or with allow_stale the newest one within max_stale_seconds."""
+        entry = self.peek(profile)
+        with self._lock:
+            if entry is None or (entry.is_stale and not allow_stale):
+                self.misses += 1
+                return None
+            if entry.is_stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            if entry.fingerprint in self._entries:
+                self._entries.move_to_end(entry.fingerprint)
+            return entry
+
+    def put(self, profile: UserProfile, digest: str, expires_at: Optional[float] = None) -> CachedDigest:
+        """Store a digest, fresh for the profile's TTL or until expires_at if that is later."""
+        now = time.time()
+        entry = CachedDigest(
+            fingerprint=profile.fingerprint(),
+            digest=digest,
+            created_at=now,
+            expires_at=max(now + self.ttl_for(profile), expires_at or 0.0)
+        )
+        with self._lock:
+            self._remember(entry)
+        if self.store is not None:
+            self.store.put(entry)
+        return entry
+
+    def invalidate(self, profile: UserProfile):
+        with self._lock:
+            self._entries.pop(profile.fingerprint(), None)
+        if self.store is not None:
+            self.store.delete(profile.fingerprint())
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'persisted': self.store.count() if self.store is not None else 0,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stale_hit_rate': self.stale_hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,244 @@
+# digest_scheduler.py
+"""Generate digests ahead of the times readers look at them.
+
+Readers check in on a rhythm set by their investment_frequency. Each
+frequency gets a precompute window that ends at market open
+(DIGEST_MARKET_OPEN_UTC) on its schedule days:
+
+    daily      every weekday
+    weekly     Mondays
+    monthly    first weekday of the month
+    quarterly  first weekday of January, April, July and October
+    yearly     first weekday of January
+
+Within a window, each cohort (profiles sharing a fingerprint) without a digest
+from that window is queued once through the digest job queue. Work is spread
+evenly over the time left until open and capped by an hourly crew-run budget.
+Digests land in the persistent DigestCache, so /news reads become lookups. A
+digest made inside a window stays fresh until the frequency's next window
+starts (window_expiry), not just for its DIGEST_TTL_SECONDS.
+
+Runs inside the API process (DIGEST_PRECOMPUTE_ENABLED=1) or standalone:
+    python digest_scheduler.py [--once]
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from digest_cache import DigestCache
+from ingestion import UpstreamBudget
+from rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from user_profile import InvestmentFrequency, UserProfile, UserProfileManager, get_profile_manager
+
+# Earlier frequencies are more urgent when several windows overlap
+FREQUENCY_PRIORITY = [
+    InvestmentFrequency.DAILY,
+    InvestmentFrequency.WEEKLY,
+    InvestmentFrequency.MONTHLY,
+    InvestmentFrequency.QUARTERLY,
+    InvestmentFrequency.YEARLY
+]
+
+def _first_weekday(year: int, month: int) -> date:
+    day = date(year, month, 1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+def is_schedule_day(frequency: InvestmentFrequency, day: date) -> bool:
+    if day.weekday() >= 5:
+        return False
+    if frequency == InvestmentFrequency.DAILY:
+        return True
+    if frequency == InvestmentFrequency.WEEKLY:
+        return day.weekday() == 0
+    if frequency == InvestmentFrequency.MONTHLY:
+        return day == _first_weekday(day.year, day.month)
+    if frequency == InvestmentFrequency.QUARTERLY:
+        return day.month in (1, 4, 7, 10) and day == _first_weekday(day.year, day.month)
+    return day.month == 1 and day == _first_weekday(day.year, 1)
+
+def _parse_clock(value: str) -> Tuple[int, int]:
+    hours, minutes = value.split(":")
+    return int(hours), int(minutes)
+
+class DigestPrecomputeScheduler:
+    def __init__(self, profile_manager: UserProfileManager, digest_cache: DigestCache,
+                 submit: Callable[[UserProfile], Any], budget_per_hour: Optional[int] = None,
+                 market_open_utc: Optional[str] = None, lead_minutes: Optional[float] = None,
+                 grace_minutes: Optional[float] = None, tick_seconds: Optional[float] = None):
+        """submit(profile) queues one digest run (e.g. DigestJobQueue.submit) whose result reaches digest_cache."""
+        self.profile_manager = profile_manager
+        self.digest_cache = digest_cache
+        self.submit = submit
+        self.budget = UpstreamBudget(budget_per_hour or int(os.getenv("DIGEST_PRECOMPUTE_BUDGET_PER_HOUR", "120")))
+        self.market_open = _parse_clock(market_open_utc or os.getenv("DIGEST_MARKET_OPEN_UTC", "13:30"))
+        self.lead = timedelta(minutes=lead_minutes or float(os.getenv("DIGEST_PRECOMPUTE_LEAD_MINUTES", "90")))
+        # Cohorts missed in the window (budget, downtime) are still caught up until open + grace
+        self.grace = timedelta(minutes=grace_minutes or float(os.getenv("DIGEST_PRECOMPUTE_GRACE_MINUTES", "240")))
+        self.tick_seconds = tick_seconds or float(os.getenv("DIGEST_PRECOMPUTE_TICK_SECONDS", "60"))
+        # fingerprint -> window start already queued, so a running job is not queued twice
+        self._queued: Dict[str, float] = {}
+        self.submitted = 0
+        self.failures = 0
+        self.skipped_for_budget = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _open_at(self, day: date) -> datetime:
+        hours, minutes = self.market_open
+        return datetime(day.year, day.month, day.day, hours, minutes, tzinfo=timezone.utc)
+
+    def active_window(self, frequency: InvestmentFrequency, now: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """(window start, market open) of the frequency's window covering now, if any."""
+        for offset in (0, 1):
+            day = now.date() - timedelta(days=offset)
+            if not is_schedule_day(frequency, day):
+                continue
+            market_open = self._open_at(day)
+            if market_open - self.lead <= now <= market_open + self.grace:
+                return market_open - self.lead, market_open
+        return None
+
+    def next_window_start(self, frequency: InvestmentFrequency, now: datetime) -> datetime:
+        day = now.date()
+        while True:
+            if is_schedule_day(frequency, day) and self._open_at(day) - self.lead > now:
+                return self._open_at(day) - self.lead
+            day += timedelta(days=1)
+
+    def window_expiry(self, profile: UserProfile, now: Optional[datetime] = None) -> Optional[float]:
+        """Expiry for a digest made now: the next window's start if now is inside one of the profile's windows.
+
+        The scheduler does not queue a cohort again within a window once it has a digest
+        from it, so that digest has to stay fresh until the next window replaces it.
+        """
+        now = now or datetime.now(timezone.utc)
+        if self.active_window(profile.investment_frequency, now) is None:
+            return None
+        return self.next_window_start(profile.investment_frequency, now).timestamp()
+
+    def due_cohorts(self, now: Optional[datetime] = None) -> List[Tuple[UserProfile, datetime, datetime, int]]:
+        """(representative profile, window start, open, members) per cohort still lacking this window's digest.
+
+        Most urgent first: earlier market open, then shorter frequency, then bigger cohort.
+        """
+        now = now or datetime.now(timezone.utc)
+        cohorts: Dict[str, List[UserProfile]] = {}
+        for profile in self.profile_manager.list_profiles():
+            cohorts.setdefault(profile.fingerprint(), []).append(profile)
+        due = []
+        for fingerprint, members in cohorts.items():
+            profile = members[0]
+            window = self.active_window(profile.investment_frequency, now)
+            if window is None:
+                continue
+            start, market_open = window
+            if self._queued.get(fingerprint) == start.timestamp():
+                continue
+            cached = self.digest_cache.peek(profile)
+            if cached is not None and cached.created_at >= start.timestamp():
+                continue
+            due.append((profile, start, market_open, len(members)))
+        due.sort(key=lambda item: (item[2], FREQUENCY_PRIORITY.index(item[0].investment_frequency), -item[3]))
+        return due
+
+    def run_once(self, now: Optional[datetime] = None) -> List[str]:
+        """Queue this tick's share of due cohorts. Returns the user ids submitted."""
+        now = now or datetime.now(timezone.utc)
+        due = self.due_cohorts(now)
+        if not due:
+            return []
+        # Spread the cohorts over the ticks left before the most urgent open; late work goes out at once
+        seconds_left = (due[0][2] - now).total_seconds()
+        ticks_left = max(1.0, seconds_left / self.tick_seconds)
+        quota = math.ceil(len(due) / ticks_left)
+        submitted = []
+        for profile, start, _, _ in due[:quota]:
+            if not self.budget.try_acquire():
+                self.skipped_for_budget += 1
+                break
+            try:
+                self.submit(profile)
+            except Exception as e:
+                print(f"Error queueing precomputed digest for {profile.user_id}: {e}")
+                self.failures += 1
+                continue
+            self._queued[profile.fingerprint()] = start.timestamp()
+            self.submitted += 1
+            submitted.append(profile.user_id)
+        return submitted
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in digest precompute scheduler: {e}")
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="digest-precompute", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, object]:
+        now = datetime.now(timezone.utc)
+        windows = {}
+        for frequency in FREQUENCY_PRIORITY:
+            window = self.active_window(frequency, now)
+            windows[frequency.value] = window[0].isoformat() if window else None
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'submitted': self.submitted,
+            'failures': self.failures,
+            'skipped_for_budget': self.skipped_for_budget,
+            'budget_remaining': self.budget.remaining(),
+            'active_windows': windows
+        }
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Precompute digests ahead of each reader's schedule")
+    parser.add_argument("--storage", help="Profile storage path (default: PROFILE_STORAGE_PATH)")
+    parser.add_argument("--once", action="store_true", help="Generate every due digest now and exit")
+    args = parser.parse_args()
+    load_dotenv()
+
+    profile_manager = UserProfileManager(args.storage) if args.storage else get_profile_manager()
+    digest_cache = DigestCache()
+
+    def generate(profile: UserProfile):
+        from pipeline import create_digest_generator
+        with upstream_priority(PRIORITY_BACKGROUND):
+            digest = str(create_digest_generator(profile).generate_news_digest())
+            digest_cache.put(profile, digest, expires_at=scheduler.window_expiry(profile))
+
+    scheduler = DigestPrecomputeScheduler(profile_manager, digest_cache, submit=generate)
+    if args.once:
+        # Standalone runs are synchronous, so take every due cohort in one pass
+        scheduler.tick_seconds = float("inf")
+        print(json.dumps({'generated': scheduler.run_once(), **scheduler.stats()}, indent=2))
+        return
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(scheduler.stats()))
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# ingestion.py
+"""Background sector news ingestion.
+
+Periodically pulls news for every industry offered by the questionnaire so the
+news tools find their inputs in the response cache and article store instead of
+fetching inside the crew's critical path. Sectors with more subscribed profiles
+are refreshed more often, within an hourly upstream request budget.
+
+Runs inside the API process (INGEST_ENABLED=1) or standalone:
+    python ingestion.py [--once]
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from user_profile import UserProfileManager, get_profile_manager
+
+class UpstreamBudget:
+    """Sliding-window cap on upstream requests."""
+
+    def __init__(self, max_requests: int, window_seconds: float = 3600):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._sent and now - self._sent[0] >= self.window_seconds:
+            self._sent.popleft()
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        with self._lock:
+            self._trim(now)
+            if len(self._sent) >= self.max_requests:
+                return False
+            self._sent.append(now)
+            return True
+
+    def remaining(self, now: Optional[float] = None) -> int:
+        with self._lock:
+            self._trim(now or time.time())
+            return self.max_requests - len(self._sent)
+
+def _fetch_sector(sector: str):
+    from tools.news_research_tool import SECTOR_KEYWORDS, fetch_financial_news
+    # Same parameters as get_sector_news so the warmed entries are the ones the tool looks up
+    return fetch_financial_news(keywords=SECTOR_KEYWORDS.get(sector, sector), limit=8, sector=sector, refresh=True)
+
+def questionnaire_sectors(questionnaire) -> List[str]:
+    question = questionnaire.get_question_by_id("industries")
+    return [option["value"] for option in question["options"]]
+
+class SectorIngestionScheduler:
+    def __init__(self, profile_manager: UserProfileManager, sectors: List[str],
+                 budget_per_hour: Optional[int] = None, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, fetch: Optional[Callable[[str], object]] = None):
+        self.profile_manager = profile_manager
+        self.sectors = [sector.lower() for sector in sectors]
+        self.budget = UpstreamBudget(budget_per_hour or int(os.getenv("INGEST_BUDGET_PER_HOUR", "60")))
+        self.min_interval = min_interval or float(os.getenv("INGEST_MIN_INTERVAL", "300"))
+        self.max_interval = max_interval or float(os.getenv("INGEST_MAX_INTERVAL", "3600"))
+        self.fetch = fetch or _fetch_sector
+        self.last_refreshed: Dict[str, float] = {}
+        self.refreshes = 0
+        self.failures = 0
+        self.skipped_for_budget = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        counts = {sector: 0 for sector in self.sectors}
+        for profile in self.profile_manager.list_profiles():
+            for industry in profile.industry_preferences:
+                if industry.lower() in counts:
+                    counts[industry.lower()] += 1
+        return counts
+
+    def sector_intervals(self) -> Dict[str, float]:
+        """Refresh interval per sector; shrinks with the square root of its subscriber count."""
+        return {
+            sector: max(self.min_interval, self.max_interval / math.sqrt(1 + subscribers))
+            for sector, subscribers in self.subscriber_counts().items()
+        }
+
+    def due_sectors(self, now: Optional[float] = None) -> List[str]:
+        """Sectors past their interval, most overdue (relative to interval) first."""
+        now = now or time.time()
+        overdue = []
+        for sector, interval in self.sector_intervals().items():
+            ratio = (now - self.last_refreshed.get(sector, 0.0)) / interval
+            if ratio >= 1.0:
+                overdue.append((ratio, sector))
+        return [sector for _, sector in sorted(overdue, reverse=True)]
+
+    def run_once(self, now: Optional[float] = None) -> List[str]:
+        """Refresh every due sector the budget allows. Returns the sectors refreshed."""
+        if not os.getenv("NEWS_API_KEY"):
+            return []
+        refreshed = []
+        for sector in self.due_sectors(now):
+            if not self.budget.try_acquire():
+                self.skipped_for_budget += 1
+                break
+            try:
+                with upstream_priority(PRIORITY_BACKGROUND):
+                    self.fetch(sector)
+            except Exception as e:
+                print(f"Error ingesting {sector} news: {e}")
+                self.failures += 1
+                continue
+            self.last_refreshed[sector] = time.time()
+            self.refreshes += 1
+            refreshed.append(sector)
+        return refreshed
+
+    def _seconds_until_next_due(self) -> float:
+        now = time.time()
+        waits = [
+            self.last_refreshed.get(sector, 0.0) + interval - now
+            for sector, interval in self.sector_intervals().items()
+        ]
+        return min(max(min(waits, default=self.min_interval), 1.0), self.min_interval)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self._seconds_until_next_due())
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="sector-ingestion", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, object]:
+        now = time.time()
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'skipped_for_budget': self.skipped_for_budget,
+            'budget_remaining': self.budget.remaining(),
+            'intervals': {sector: round(interval) for sector, interval in self.sector_intervals().items()},
+            'age_seconds': {sector: round(now - ts) for sector, ts in self.last_refreshed.items()}
+        }
+
+def main():
+    from dotenv import load_dotenv
+    from questionnaire import InvestmentQuestionnaire
+
+    parser = argparse.ArgumentParser(description="Pre-fetch sector news ahead of demand")
+    parser.add_argument("--storage", help="Profile storage path (default: PROFILE_STORAGE_PATH)")
+    parser.add_argument("--once", action="store_true", help="Refresh due sectors once and exit")
+    args = parser.parse_args()
+    load_dotenv()
+
+    profile_manager = UserProfileManager(args.storage) if args.storage else get_profile_manager()
+    scheduler = SectorIngestionScheduler(profile_manager, questionnaire_sectors(InvestmentQuestionnaire(profile_manager)))
+    if args.once:
+        print(json.dumps({'refreshed': scheduler.run_once(), **scheduler.stats()}, indent=2))
+        return
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(scheduler.stats()))
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+# jobs.py
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rate_limit import PRIORITY_INTERACTIVE, upstream_priority
+from user_profile import UserProfile
+from workers import web_concurrency
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+@dataclass
+class DigestJob:
+    job_id: str
+    user_id: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    # Upstream queueing priority of the crew run (rate_limit.py); background work yields to readers
+    priority: int = PRIORITY_INTERACTIVE
+    # Intermediate crew task outputs in completion order: {'stage', 'output', 'at'}
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    # Submits with the same key join one active job; the user id unless a caller shares runs (cohort_job_key)
+    key: str = ""
+
+    def __post_init__(self):
+        self.key = self.key or self.user_id
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'status': self.status.value,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'completed_stages': [stage['stage'] for stage in self.stages],
+            'error': self.error
+        }
+
+def cohort_job_key(profile: UserProfile) -> str:
+    """Job key shared by every profile with the same fingerprint, for runs any member's digest can come from."""
+    return f"cohort:{profile.fingerprint()}"
+
+def _boot_id() -> str:
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+BOOT_ID = _boot_id()
+
+# Stores opened by this process; rows owned by our pid found on first open belong to an earlier process
+_opened_paths = set()
+_opened_lock = threading.Lock()
+
+def _owner_alive(owner: str) -> bool:
+    """Whether the process that wrote owner ("<boot id>:<pid>") is still running."""
+    boot_id, _, pid = owner.rpartition(":")
+    if boot_id != BOOT_ID or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobStore:
+    """SQLite record of digest jobs shared by every API worker process.
+
+    Any worker can report a job's status, stages and result, and a job key has
+    at most one active job across all workers (enforced by a partial unique index).
+    Each row names its owner process (boot id and pid). Active jobs of owners
+    that are gone (a crash, a restart or a reboot) are failed when the store
+    opens and whenever a request would join them. Owners heartbeat their
+    unfinished jobs, queued ones included; an active job silent for
+    abandon_after seconds is failed as well.
+    """
+
+    def __init__(self, path: str, abandon_after: Optional[float] = None):
+        self.path = path
+        self.abandon_after = abandon_after or float(os.getenv("DIGEST_JOB_ABANDON_SECONDS", "900"))
+        self.owner = f"{BOOT_ID}:{os.getpid()}"
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS digest_jobs (
+                       job_id TEXT PRIMARY KEY,
+                       user_id TEXT NOT NULL,
+                       status TEXT NOT NULL,
+                       active INTEGER NOT NULL,
+                       priority INTEGER NOT NULL,
+                       created_at REAL NOT NULL,
+                       started_at REAL,
+                       finished_at REAL,
+                       updated_at REAL NOT NULL,
+                       result TEXT,
+                       error TEXT,
+                       stages TEXT NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_digest_jobs_updated ON digest_jobs(updated_at)")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(digest_jobs)")]
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE digest_jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            if "job_key" not in columns:
+                conn.execute("ALTER TABLE digest_jobs ADD COLUMN job_key TEXT NOT NULL DEFAULT ''")
+                conn.execute("UPDATE digest_jobs SET job_key = user_id")
+            conn.execute("DROP INDEX IF EXISTS idx_digest_jobs_active_user")
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_digest_jobs_active_key ON digest_jobs(job_key) WHERE active = 1"
+            )
+        with _opened_lock:
+            first_open = path not in _opened_paths
+            _opened_paths.add(path)
+        self.fail_orphans(reclaim_own=first_open)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _job(row) -> DigestJob:
+        job_id, user_id, status, priority, created_at, started_at, finished_at, result, error, stages, key = row
+        return DigestJob(
+            job_id=job_id, user_id=user_id, status=JobStatus(status), priority=priority, created_at=created_at,
+            started_at=started_at, finished_at=finished_at, result=result, error=error, stages=json.loads(stages),
+            key=key
+        )
+
+    _COLUMNS = ("job_id, user_id, status, priority, created_at, started_at, finished_at, result, error, stages, "
+                "job_key")
+
+    def get(self, job_id: str) -> Optional[DigestJob]:
+        row = self._connection().execute(
+            f"SELECT {self._COLUMNS} FROM digest_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._job(row) if row else None
+
+    def _fail(self, job_ids: List[str], error: str):
+        if not job_ids:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """UPDATE digest_jobs SET active = 0, status = ?, error = ?, finished_at = ?, updated_at = ?
+                   WHERE job_id = ? AND finished_at IS NULL""",
+                [(JobStatus.FAILED.value, error, time.time(), time.time(), job_id) for job_id in job_ids]
+            )
+
+    def fail_orphans(self, key: Optional[str] = None, reclaim_own: bool = False):
+        """Fail active jobs whose owner process is gone or which stopped heartbeating.
+
+        reclaim_own also fails rows carrying this process's owner, left by an earlier
+        process that had the same pid (container restarts reuse pids).
+        """
+        query = "SELECT job_id, owner, updated_at FROM digest_jobs WHERE active = 1"
+        params: tuple = ()
+        if key is not None:
+            query += " AND job_key = ?"
+            params = (key,)
+        silent_since = time.time() - self.abandon_after
+        orphans = [
+            job_id for job_id, owner, updated_at in self._connection().execute(query, params)
+            if updated_at < silent_since or not _owner_alive(owner) or (reclaim_own and owner == self.owner)
+        ]
+        self._fail(orphans, "Abandoned by its worker")
+
+    def touch(self, job_ids: List[str]):
+        """Heartbeat: mark this owner's unfinished jobs as alive."""
+        if not job_ids:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE digest_jobs SET updated_at = ? WHERE job_id = ? AND finished_at IS NULL",
+                [(time.time(), job_id) for job_id in job_ids]
+            )
+
+    def claim(self, job: DigestJob) -> Optional[DigestJob]:
+        """Record job as its key's active job, or return the active job another submit got in first with."""
+        conn = self._connection()
+        self.fail_orphans(job.key)
+        for _ in range(3):
+            try:
+                with conn:
+                    conn.execute(
+                        f"""INSERT INTO digest_jobs ({self._COLUMNS}, active, updated_at, owner)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)""",
+                        (job.job_id, job.user_id, job.status.value, job.priority, job.created_at, job.started_at,
+                         job.finished_at, job.result, job.error, json.dumps(job.stages), job.key, time.time(),
+                         self.owner)
+                    )
+                return None
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM digest_jobs WHERE job_key = ? AND active = 1", (job.key,)
+                ).fetchone()
+                # None: the other job finished in between, so try to insert again
+                if row is not None:
+                    return self._job(row)
+        raise RuntimeError(f"Could not claim a digest job for {job.key}")
+
+    def save(self, job: DigestJob) -> bool:
+        """Write the job's progress. A finished job stops being active; nothing makes a job active again.
+
+        Rows already finished, e.g. failed as abandoned, are left alone; returns False for them.
+        Released jobs (release_user) keep recording progress for clients following them.
+        """
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                """UPDATE digest_jobs SET status = ?, started_at = ?, finished_at = ?, result = ?, error = ?,
+                          stages = ?, updated_at = ?, active = CASE WHEN ? THEN 0 ELSE active END
+                   WHERE job_id = ? AND finished_at IS NULL""",
+                (job.status.value, job.started_at, job.finished_at, job.result, job.error, json.dumps(job.stages),
+                 time.time(), job.is_finished, job.job_id)
+            ).rowcount > 0
+
+    def release_user(self, user_id: str) -> bool:
+        """Stop handing the user's own active job to new requests; it still runs and keeps its record.
+
+        Cohort jobs (cohort_job_key) are left joinable: their digest is still right for the old cohort.
+        """
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                "UPDATE digest_jobs SET active = 0 WHERE job_key = ? AND active = 1", (user_id,)
+            ).rowcount > 0
+
+    def prune(self, finished_before: float) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                "DELETE FROM digest_jobs WHERE active = 0 AND updated_at < ?", (finished_before,)
+            ).rowcount
+
+class DigestJobQueue:
+    """Runs digest generation on a bounded thread pool instead of the event loop.
+
+    Crew runs are dominated by waiting on Groq and NewsAPI, so threads are enough;
+    crew objects are also not picklable, which rules out a process pool.
+
+    runner(profile, on_stage) produces the digest and calls on_stage(stage, output)
+    as each crew task finishes so streaming clients can follow along.
+
+    Waiting jobs start by priority, so interactive digests overtake queued
+    precompute and batch work, and at most max_background background jobs
+    (DIGEST_BACKGROUND_WORKERS) run at once.
+
+    With several API workers (WEB_CONCURRENCY > 1) a JobStore at
+    DIGEST_JOB_STORE_PATH makes jobs visible to, and joined by, every worker
+    process; jobs another worker runs are followed by polling it. A single
+    worker keeps jobs in memory only.
+    """
+
+    def __init__(self, runner: Callable[[UserProfile, Callable[[str, str], None]], str],
+                 max_workers: Optional[int] = None, max_finished_jobs: Optional[int] = None,
+                 store_path: Optional[str] = None, max_background: Optional[int] = None):
+        self.runner = runner
+        self.max_workers = max_workers or int(os.getenv("DIGEST_WORKERS", "4"))
+        # Background jobs (precompute, batch) never hold every thread, so readers always find one
+        self.max_background = max_background or int(
+            os.getenv("DIGEST_BACKGROUND_WORKERS", str(max(1, self.max_workers // 2))))
+        self.max_finished_jobs = max_finished_jobs or int(os.getenv("DIGEST_JOB_HISTORY", "1000"))
+        if store_path is None:
+            store_path = os.getenv("DIGEST_JOB_STORE_PATH", "/tmp/digest_jobs.db") if web_concurrency() > 1 else ""
+        self.store = JobStore(store_path) if store_path else None
+        self.retention_seconds = float(os.getenv("DIGEST_JOB_RETENTION_SECONDS", str(24 * 3600)))
+        self.poll_seconds = float(os.getenv("DIGEST_JOB_POLL_SECONDS", "0.5"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="digest")
+        self._lock = threading.Lock()
+        # job id -> (loop, event) of async waiters following a job this process runs
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._jobs: "OrderedDict[str, DigestJob]" = OrderedDict()
+        # job key -> id of its active job
+        self._active: Dict[str, str] = {}
+        # Jobs waiting for a thread: (priority, sequence, job, profile), lowest priority value first
+        self._pending: List[Tuple[int, int, DigestJob, UserProfile]] = []
+        self._sequence = itertools.count()
+        self._busy = 0
+        self._background_busy = 0
+        self._pruned_at = 0.0
+        self._stop = threading.Event()
+        if self.store is not None:
+            # Queued jobs can wait a long time for a thread; keep their rows from looking abandoned
+            threading.Thread(target=self._heartbeat, name="digest-job-heartbeat", daemon=True).start()
+
+    def submit(self, profile: UserProfile, priority: int = PRIORITY_INTERACTIVE,
+               key: Optional[str] = None) -> Tuple[DigestJob, bool]:
+        """Queue a digest for the profile, or join the active job with the same key (default: the user id).
+
+        Returns (job, joined_existing).
+        """
+        job = DigestJob(job_id=uuid.uuid4().hex, user_id=profile.user_id, priority=priority, key=key or "")
+        if self.store is not None:
+            # The store, not this process, knows whether any worker is already running one
+            existing = self.store.claim(job)
+            if existing is not None:
+                with self._lock:
+                    return self._jobs.get(existing.job_id, existing), True
+        with self._lock:
+            active_id = self._active.get(job.key)
+            if active_id is not None and self.store is None:
+                return self._jobs[active_id], True
+            self._jobs[job.job_id] = job
+            self._active[job.key] = job.job_id
+            self._prune_finished()
+            heapq.heappush(self._pending, (job.priority, next(self._sequence), job, profile))
+            self._dispatch()
+        return job, False
+
+    @staticmethod
+    def _is_background(job: DigestJob) -> bool:
+        return job.priority > PRIORITY_INTERACTIVE
+
+    def _dispatch(self):
+        # Caller holds the lock. Hand pending jobs to free threads by priority, FIFO within one,
+        # skipping background jobs while max_background of them are running.
+        while self._busy < self.max_workers:
+            chosen = None
+            for entry in sorted(self._pending):
+                if not self._is_background(entry[2]) or self._background_busy < self.max_background:
+                    chosen = entry
+                    break
+            if chosen is None:
+                return
+            self._pending.remove(chosen)
+            heapq.heapify(self._pending)
+            _, _, job, profile = chosen
+            self._busy += 1
+            if self._is_background(job):
+                self._background_busy += 1
+            self._executor.submit(self._execute, job, profile)
+
+    def _execute(self, job: DigestJob, profile: UserProfile):
+        try:
+            self._run(job, profile)
+        finally:
+            with self._lock:
+                self._busy -= 1
+                if self._is_background(job):
+                    self._background_busy -= 1
+                self._dispatch()
+
+    def get(self, job_id: str) -> Optional[DigestJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.get(job_id)
+        return job
+
+    def release_user(self, user_id: str):
+        """Detach the user's own active job, on every worker, so the next submit starts a fresh one.
+
+        Call when the profile changes: a digest still running for the old answers must not be joined.
+        """
+        with self._lock:
+            self._active.pop(user_id, None)
+        if self.store is not None:
+            self.store.release_user(user_id)
+
+    async def wait_for_update(self, job: DigestJob, seen_stages: int, timeout: float) -> bool:
+        """Wait until the job has more than seen_stages stages or finishes. False on timeout.
+
+        Jobs run by this process wake the waiter directly, without holding a thread;
+        jobs another worker runs are followed by polling the shared store.
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            local = self._jobs.get(job.job_id) is job
+            if local or self.store is None:
+                if len(job.stages) > seen_stages or job.is_finished:
+                    return True
+                self._waiters.setdefault(job.job_id, []).append((loop, event))
+        if local or self.store is None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                with self._lock:
+                    waiters = self._waiters.get(job.job_id, [])
+                    if (loop, event) in waiters:
+                        waiters.remove((loop, event))
+                    if not waiters:
+                        self._waiters.pop(job.job_id, None)
+        # Run by another worker: poll the shared record and copy it into job
+        deadline = loop.time() + timeout
+        while True:
+            latest = await asyncio.to_thread(self.store.get, job.job_id)
+            if latest is None:
+                job.status, job.error = JobStatus.FAILED, "Job record expired"
+                return True
+            if len(latest.stages) > seen_stages or latest.is_finished:
+                job.__dict__.update(latest.__dict__)
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.poll_seconds, remaining))
+
+    def _notify(self, job: DigestJob):
+        # Caller holds the lock. Wake async waiters on their own event loops.
+        for loop, event in self._waiters.get(job.job_id, []):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed; its waiter is gone
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {status.value: 0 for status in JobStatus}
+            for job in self._jobs.values():
+                counts[job.status.value] += 1
+            counts['pending'] = len(self._pending)
+            counts['background_running'] = self._background_busy
+        counts['workers'] = self.max_workers
+        counts['background_workers'] = self.max_background
+        return counts
+
+    def shutdown(self, wait: bool = False):
+        self._stop.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.store.abandon_after / 3):
+            with self._lock:
+                unfinished = [job_id for job_id, job in self._jobs.items() if not job.is_finished]
+            try:
+                self.store.touch(unfinished)
+            except sqlite3.Error as e:
+                print(f"Error heartbeating digest jobs: {e}")
+
+    def _save(self, job: DigestJob) -> bool:
+        """False if the shared record was already finished elsewhere (e.g. failed as abandoned)."""
+        if self.store is None:
+            return True
+        with self._lock:
+            snapshot = replace(job, stages=list(job.stages))
+        try:
+            return self.store.save(snapshot)
+        except sqlite3.Error as e:
+            print(f"Error saving digest job {job.job_id}: {e}")
+            return True
+
+    def _record_stage(self, job: DigestJob, stage: str, output: str):
+        with self._lock:
+            job.stages.append({'stage': stage, 'output': output, 'at': time.time()})
+            self._notify(job)
+        self._save(job)
+
+    def _run(self, job: DigestJob, profile: UserProfile):
+        with self._lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+        if not self._save(job):
+            # Given up on while queued and possibly resubmitted; running it now would duplicate the digest
+            with self._lock:
+                job.status = JobStatus.FAILED
+                job.error = "Abandoned before it started"
+                job.finished_at = time.time()
+                if self._active.get(job.key) == job.job_id:
+                    del self._active[job.key]
+                self._notify(job)
+            return
+        try:
+            with upstream_priority(job.priority):
+                result = self.runner(profile, lambda stage, output: self._record_stage(job, stage, output))
+            with self._lock:
+                job.result = str(result)
+                job.status = JobStatus.COMPLETED
+        except Exception as e:
+            print(f"Error generating news digest for {profile.user_id}: {e}")
+            with self._lock:
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+        finally:
+            with self._lock:
+                job.finished_at = time.time()
+                if self._active.get(job.key) == job.job_id:
+                    del self._active[job.key]
+                self._notify(job)
+            self._save(job)
+
+    def _prune_finished(self):
+        # Caller holds the lock. Oldest finished jobs go first; active jobs are never dropped.
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        excess = len(finished) - self.max_finished_jobs
+        for job_id in finished[:max(excess, 0)]:
+            del self._jobs[job_id]
+        now = time.time()
+        if self.store is not None and now - self._pruned_at > 3600:
+            self._pruned_at = now
+            self.store.prune(now - self.retention_seconds)
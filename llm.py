@@ -1,8 +1,52 @@
 import os
+from typing import Any, List, Optional
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
 from langchain_groq import ChatGroq
+from llm_cache import create_llm_cache
+from llm_metrics import LLMMetricsHandler
+from rate_limit import groq_limiter
+
+# Exact-match completion cache shared by every agent; None when LLM_CACHE_ENABLED=0
+llm_cache = create_llm_cache()
+
+def _estimated_tokens(messages: List[BaseMessage], max_tokens: Optional[int]) -> int:
+    # Groq counts prompt + completion against the per-minute token limit; settle() corrects the guess
+    prompt_chars = sum(len(str(message.content)) for message in messages)
+    return prompt_chars // 4 + (max_tokens or 512)
+
+def _total_tokens(result: ChatResult) -> Optional[int]:
+    return ((result.llm_output or {}).get("token_usage") or {}).get("total_tokens")
+
+class ScheduledChatGroq(ChatGroq):
+    """ChatGroq whose requests wait for the shared Groq limiter (rate_limit.py).
+
+    Cache hits never reach _generate, so they cost no quota.
+    """
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        generate = super()._generate
+        return groq_limiter.call(
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            tokens=_estimated_tokens(messages, self.max_tokens), used_tokens=_total_tokens
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        agenerate = super()._agenerate
+        return await groq_limiter.call_async(
+            lambda: agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            tokens=_estimated_tokens(messages, self.max_tokens), used_tokens=_total_tokens
+        )
 
 # Initialize the LLM once and import it in other files
-llm = ChatGroq(
+llm = ScheduledChatGroq(
     api_key=os.getenv("GROQ_API_KEY"),
-    model="llama3-70b-8192" # Using a standard, recommended model for Groq
+    model="llama3-70b-8192", # Using a standard, recommended model for Groq
+    cache=llm_cache,
+    # 429s are retried by groq_limiter, which honours Retry-After for every caller at once
+    max_retries=0,
+    # Per-call latency and token usage for /metrics
+    callbacks=[LLMMetricsHandler()]
 )
@@ -0,0 +1,166 @@
+# llm_cache.py
+"""Exact-match completion cache for the shared ChatGroq client.
+
+Plugs into LangChain's cache hook (the `cache=` argument of chat models), so
+every agent that uses `llm` benefits without code changes. Entries live in
+SQLite, are keyed by a hash of the model/sampling params and the prompt
+messages, expire after LLM_CACHE_TTL seconds and are evicted least recently
+used beyond LLM_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from metrics import current_stage
+
+# True bypasses every call; a frozenset bypasses calls made while one of those crew stages runs
+_bypass: ContextVar[Union[bool, frozenset]] = ContextVar("llm_cache_bypass", default=False)
+
+@contextmanager
+def llm_cache_bypass(stages: Optional[Iterable[str]] = None):
+    """Skip the completion cache for LLM calls made inside this block (e.g. prompts with live data).
+
+    With stages, only calls made while one of those crew stages runs (metrics.track_crew) skip it.
+    """
+    token = _bypass.set(frozenset(stages) if stages is not None else True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+def _bypassed() -> bool:
+    bypass = _bypass.get()
+    return bypass is True or (bool(bypass) and current_stage() in bypass)
+
+class SQLiteCompletionCache(BaseCache):
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS completions (
+                       key TEXT PRIMARY KEY,
+                       value TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_used REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        # llm_string carries the model name and sampling params; prompt is the serialized messages
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _bypassed():
+            self._count("bypassed")
+            return None
+        key = self.make_key(prompt, llm_string)
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM completions WHERE key = ? AND created_at > ?", (key, now - self.ttl_seconds)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        with conn:
+            conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return [loads(generation) for generation in _split(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if _bypassed():
+            return
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        value = _join([dumps(generation) for generation in return_val])
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            conn.execute("DELETE FROM completions WHERE created_at <= ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """DELETE FROM completions WHERE key IN (
+                       SELECT key FROM completions ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM completions")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._connection().execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+# Generations are stored as one text column; the separator cannot appear in JSON output
+_SEPARATOR = "\x1e"
+
+def _join(parts: Sequence[str]) -> str:
+    return _SEPARATOR.join(parts)
+
+def _split(value: str) -> Sequence[str]:
+    return value.split(_SEPARATOR)
+
+def create_llm_cache() -> Optional[SQLiteCompletionCache]:
+    """Cache configured from the environment, or None when LLM_CACHE_ENABLED=0.
+
+    With LLM_CACHE_SHARED=1 (default) all worker processes on the host share one
+    database file; otherwise each process gets its own.
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    path = os.getenv("LLM_CACHE_PATH", "/tmp/llm_cache.db")
+    if os.getenv("LLM_CACHE_SHARED", "1") == "0":
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{os.getpid()}{ext}"
+    return SQLiteCompletionCache(
+        path=path,
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    )
@@ -0,0 +1,54 @@
+# llm_metrics.py
+"""LangChain callback that records per-call LLM latency and token usage in metrics.py.
+
+Attached to the shared ChatGroq client in llm.py, so every agent is covered.
+Calls are labelled with the crew stage that is running (see metrics.track_crew).
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from metrics import LLM_ERRORS, LLM_LATENCY, LLM_PROMPT_TOKENS, LLM_TOKENS, current_stage
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    def __init__(self):
+        # run_id -> (start time, stage at start); the stage can advance before the call returns
+        self._started: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID):
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), current_stage())
+
+    def _finish(self, run_id: UUID) -> Optional[tuple]:
+        with self._lock:
+            return self._started.pop(run_id, None)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started = self._finish(run_id)
+        if started is None:
+            return
+        started_at, stage = started
+        LLM_LATENCY.observe(time.perf_counter() - started_at, stage=stage)
+        # Groq reports usage under llm_output["token_usage"]; cached completions have none
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens:
+            LLM_TOKENS.inc(prompt_tokens, stage=stage, kind="prompt")
+            LLM_PROMPT_TOKENS.observe(prompt_tokens, stage=stage)
+        if usage.get("completion_tokens"):
+            LLM_TOKENS.inc(usage["completion_tokens"], stage=stage, kind="completion")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        started = self._finish(run_id)
+        LLM_ERRORS.inc(stage=started[1] if started else current_stage())
@@ -1,15 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any
+import json
 import os
+import sys
+import threading
+import time
 from dotenv import load_dotenv
 import uvicorn
 
-# Import your existing modules
-from user_profile import UserProfile, UserProfileManager
+# Import your existing modules. crew/llm (crewai, langchain, Groq) are imported on
+# first use so the process can bind its port and answer light endpoints quickly.
+from user_profile import UserProfile, get_profile_manager
 from questionnaire import InvestmentQuestionnaire
-from crew import NewsAICrew
+from jobs import DigestJobQueue, JobStatus, cohort_job_key
+from digest_cache import DigestCache
+from tools.news_cache import news_response_cache
+from tools.quote_service import quote_service, parse_symbols
+from tools.http_client import close_http_client
+from tools.article_store import get_article_store
+from tools.dedup import near_duplicates
+from summary_cache import get_summary_cache
+from ingestion import SectorIngestionScheduler, questionnaire_sectors
+from digest_scheduler import DigestPrecomputeScheduler
+from pipeline import create_digest_generator
+from watchlist import WatchlistAnalyzer, WatchlistReport
+from metrics import REGISTRY, REQUEST_LATENCY
+from rate_limit import PRIORITY_BACKGROUND, upstream_stats
+from workers import HostLock, web_concurrency
 from api.models import *
 
 load_dotenv()
@@ -26,13 +46,106 @@ app.add_middleware(
 )
 
 # Initialize managers
-profile_manager = UserProfileManager()
-questionnaire = InvestmentQuestionnaire()
+profile_manager = get_profile_manager()
+questionnaire = InvestmentQuestionnaire(profile_manager)
+
+digest_cache = DigestCache()
+precompute_enabled = os.getenv("DIGEST_PRECOMPUTE_ENABLED", "0") == "1"
+
+def run_news_digest(profile: UserProfile, on_stage=None) -> str:
+    news_crew = create_digest_generator(profile, on_task_complete=on_stage)
+    result = str(news_crew.generate_news_digest())
+    # A digest made inside a precompute window serves the whole window, so it lives until the next one
+    expires_at = digest_precompute.window_expiry(profile) if precompute_enabled else None
+    digest_cache.put(profile, result, expires_at=expires_at)
+    return result
+
+digest_jobs = DigestJobQueue(runner=run_news_digest)
+sector_ingestion = SectorIngestionScheduler(profile_manager, questionnaire_sectors(questionnaire))
+digest_precompute = DigestPrecomputeScheduler(
+    profile_manager, digest_cache,
+    submit=lambda profile: digest_jobs.submit(profile, priority=PRIORITY_BACKGROUND, key=cohort_job_key(profile))
+)
+watchlist = WatchlistAnalyzer()
+# Held by the one worker process that runs host-wide schedulers
+background_lock = HostLock("background")
+
+def preload_crew_modules():
+    import crew
+
+@app.on_event("startup")
+async def start_sector_ingestion():
+    ingest = os.getenv("INGEST_ENABLED", "0") == "1"
+    if (ingest or precompute_enabled) and background_lock.acquire():
+        if ingest:
+            sector_ingestion.start()
+        if precompute_enabled:
+            digest_precompute.start()
+    # Long-lived servers can warm the crew imports in the background after binding;
+    # serverless deployments leave it off and pay the import on the first digest only
+    if os.getenv("PRELOAD_CREW", "0") == "1":
+        threading.Thread(target=preload_crew_modules, name="preload-crew", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_digest_jobs():
+    sector_ingestion.stop()
+    digest_precompute.stop()
+    background_lock.release()
+    digest_jobs.shutdown()
+    watchlist.shutdown()
+    close_http_client()
 
 @app.get("/")
 async def root():
     return {"message": "AI Finance News Curator API"}
 
+def collect_cache_stats() -> Dict[str, Any]:
+    article_store = get_article_store()
+    # llm.py is only loaded once a digest has run; importing it here would defeat the lazy start
+    llm_module = sys.modules.get("llm")
+    llm_cache = llm_module.llm_cache if llm_module else None
+    return {
+        "digests": digest_cache.stats(),
+        "news_api": news_response_cache.stats(),
+        "quotes": quote_service.stats(),
+        "article_store": article_store.stats() if article_store else None,
+        "dedup": near_duplicates.stats(),
+        "summaries": get_summary_cache().stats(),
+        "ingestion": sector_ingestion.stats(),
+        "watchlist": watchlist.stats(),
+        "llm": llm_cache.stats() if llm_cache else None
+    }
+
+REGISTRY.register_stats("cache", collect_cache_stats)
+REGISTRY.register_stats("digest_jobs", digest_jobs.stats)
+REGISTRY.register_stats("digest_precompute", digest_precompute.stats)
+REGISTRY.register_stats("upstream", upstream_stats)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so user ids do not explode the series count
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started, method=request.method,
+            route=getattr(route, "path", "unmatched"), status=status
+        )
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return collect_cache_stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, crew stage, LLM and tool metrics plus cache stats."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/questionnaire")
 async def get_questionnaire():
     return {"questions": questionnaire.get_all_questions()}
@@ -40,10 +153,14 @@ async def get_questionnaire():
 @app.post("/profile")
 async def create_profile(profile_data: ProfileCreationRequest):
     try:
+        previous = profile_manager.get_profile(profile_data.user_id)
         profile = questionnaire.create_profile_from_responses(
             profile_data.user_id,
             profile_data.responses
         )
+        if previous is not None and previous.fingerprint() != profile.fingerprint():
+            # A digest still running for the old answers must not be joined by requests on any worker
+            digest_jobs.release_user(profile.user_id)
         return {"success": True, "profile": profile.to_dict()}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -55,21 +172,135 @@ async def get_profile(user_id: str):
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile.to_dict()
 
-@app.post("/news/{user_id}")
-async def get_personalized_news(user_id: str):
+@app.post("/news/{user_id}", status_code=202)
+async def get_personalized_news(user_id: str, response: Response):
     profile = profile_manager.get_profile(user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    try:
-        news_crew = NewsAICrew(profile)
-        result = news_crew.generate_news_digest()
-        return {"success": True, "news_digest": result}
-    except Exception as e:
-        print(f"Error generating news digest: {e}") # Added for better logging
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+    cached = digest_cache.get(profile, allow_stale=True)
+    if cached is not None:
+        response.status_code = 200
+        response.headers["Age"] = str(int(cached.age))
+        body = {"success": True, "news_digest": cached.digest, "cached": True, "stale": cached.is_stale,
+                "age_seconds": int(cached.age)}
+        if cached.is_stale:
+            # Answer with the old digest now; one background refresh per cohort, joined by its other readers
+            job, joined = digest_jobs.submit(profile, priority=PRIORITY_BACKGROUND, key=cohort_job_key(profile))
+            response.headers["X-Digest-Cache"] = "STALE"
+            body["refresh_job_id"] = job.job_id
+        else:
+            response.headers["X-Digest-Cache"] = "HIT"
+        return body
+
+    response.headers["X-Digest-Cache"] = "MISS"
+    job, joined = digest_jobs.submit(profile)
+    return {"success": True, "job_id": job.job_id, "status": job.status.value, "joined_existing": joined}
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_digest_job(job, joined: bool):
+    yield sse_event("job", {"job_id": job.job_id, "joined_existing": joined})
+    sent = 0
+    while True:
+        # Replay stages already recorded (a joined job may be part-way through), then wait for more
+        while sent < len(job.stages):
+            stage = job.stages[sent]
+            yield sse_event(stage["stage"], {"job_id": job.job_id, "output": stage["output"]})
+            sent += 1
+        if job.status == JobStatus.COMPLETED:
+            yield sse_event("complete", {"job_id": job.job_id, "news_digest": job.result})
+            return
+        if job.status == JobStatus.FAILED:
+            yield sse_event("error", {"job_id": job.job_id, "detail": job.error})
+            return
+        updated = await digest_jobs.wait_for_update(job, sent, SSE_HEARTBEAT_SECONDS)
+        if not updated:
+            yield ": keep-alive\n\n"
+
+@app.get("/news/{user_id}/stream")
+async def stream_personalized_news(user_id: str):
+    """Server-Sent Events: curation, summaries and ranking as each crew task completes, then complete.
+
+    An expired cached digest is sent first as a stale event while it is refreshed.
+    """
+    profile = profile_manager.get_profile(user_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    cached = digest_cache.get(profile, allow_stale=True)
+    if cached is not None and not cached.is_stale:
+        async def cached_stream():
+            yield sse_event("complete", {"news_digest": cached.digest, "cached": True})
+        headers["X-Digest-Cache"] = "HIT"
+        return StreamingResponse(cached_stream(), media_type="text/event-stream", headers=headers)
+
+    # A stale reader watches the refresh, so it stays interactive, but still shares the cohort's run
+    key = cohort_job_key(profile) if cached is not None else None
+    job, joined = digest_jobs.submit(profile, key=key)
+    if cached is None:
+        headers["X-Digest-Cache"] = "MISS"
+        return StreamingResponse(stream_digest_job(job, joined), media_type="text/event-stream", headers=headers)
+
+    async def stale_then_refresh():
+        # The old digest first so the reader has something, then the refresh as it runs
+        yield sse_event("stale", {"news_digest": cached.digest, "age_seconds": int(cached.age)})
+        async for event in stream_digest_job(job, joined):
+            yield event
+    headers["X-Digest-Cache"] = "STALE"
+    return StreamingResponse(stale_then_refresh(), media_type="text/event-stream", headers=headers)
+
+@app.get("/news/jobs/{job_id}")
+async def get_news_job(job_id: str):
+    job = digest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/news/jobs/{job_id}/result")
+async def get_news_job_result(job_id: str):
+    job = digest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {job.error}")
+    if job.status != JobStatus.COMPLETED:
+        return JSONResponse(status_code=202, content={"success": False, **job.to_dict()})
+    return {"success": True, "job_id": job.job_id, "news_digest": job.result}
+
+@app.post("/watchlist/analyze")
+async def analyze_watchlist(request: WatchlistRequest):
+    """Server-Sent Events: one ticker event per analysed ticker as it finishes, then a summary."""
+    tickers = parse_symbols(" ".join(request.tickers))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers given")
+    if len(tickers) > watchlist.max_tickers:
+        raise HTTPException(status_code=400, detail=f"At most {watchlist.max_tickers} tickers per watchlist")
+
+    def events():
+        # Sync generator: Starlette iterates it in a worker thread, so blocking on crews is fine
+        report = WatchlistReport(tickers=len(tickers))
+        for result in watchlist.analyze(tickers, idle_timeout=SSE_HEARTBEAT_SECONDS):
+            if result is None:
+                yield ": keep-alive\n\n"
+                continue
+            report.record(result)
+            yield sse_event("ticker", result.to_dict())
+        yield sse_event("summary", report.summary())
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
 
 # This block allows Render to run the app.
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = web_concurrency()
+    if workers > 1:
+        # Worker processes import the app themselves; all state they share lives in SQLite (workers.py)
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,258 @@
+# metrics.py
+"""In-process metrics rendered in the Prometheus text format at /metrics.
+
+Counters and histograms are plain dicts behind a lock, so recording a sample
+costs a dict update and a bisect. METRICS_ENABLED=0 turns every record call
+into a no-op. Crew stage, LLM and tool metrics are attributed to the stage
+that is running via a StageTracker held in a ContextVar.
+"""
+import bisect
+import functools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Seconds; wide enough for sub-millisecond cache hits and multi-minute crew runs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labels, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+_METRIC_NAME_INVALID = re.compile(r"[^a-zA-Z0-9_]")
+
+def _flatten_stats(prefix: str, stats: Dict[str, Any]) -> Iterator[Tuple[str, float]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{_METRIC_NAME_INVALID.sub('_', str(key))}"
+        if isinstance(value, dict):
+            yield from _flatten_stats(name, value)
+        elif isinstance(value, (int, float)):
+            yield name, float(value)
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = "newsvault"):
+        self.namespace = namespace
+        self._metrics: Dict[str, Any] = {}
+        self._stats: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", help, labels, buckets))
+
+    def register_stats(self, prefix: str, collect: Callable[[], Optional[Dict[str, Any]]]):
+        """Export the numeric fields of a stats() dict as gauges, read at scrape time."""
+        with self._lock:
+            self._stats[prefix] = collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._stats.items())
+        lines = []
+        for metric in metrics:
+            samples = metric.render()
+            if samples:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(samples)
+        for prefix, collect in collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                print(f"Error collecting {prefix} stats for metrics: {e}")
+                continue
+            for name, value in _flatten_stats(f"{self.namespace}_{prefix}", stats or {}):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency until response headers", ("method", "route", "status"))
+CREW_LATENCY = REGISTRY.histogram(
+    "crew_duration_seconds", "Wall time of a crew kickoff", ("crew", "outcome"))
+CREW_TASK_LATENCY = REGISTRY.histogram(
+    "crew_task_duration_seconds", "Wall time of each crew task", ("crew", "stage"))
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_call_duration_seconds", "Latency of each LLM call, cache hits included", ("stage",))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM calls that raised", ("stage",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported by the LLM provider", ("stage", "kind"))
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "llm_prompt_tokens", "Prompt tokens per LLM call", ("stage",), TOKEN_BUCKETS)
+TOOL_LATENCY = REGISTRY.histogram("tool_duration_seconds", "Latency of each tool invocation", ("tool", "stage"))
+TOOL_OUTPUT_BYTES = REGISTRY.histogram(
+    "tool_output_bytes", "Size of the text a tool hands back to the LLM", ("tool",), SIZE_BUCKETS)
+TOOL_ERRORS = REGISTRY.counter("tool_errors_total", "Tool invocations that raised", ("tool",))
+UPSTREAM_WAIT = REGISTRY.histogram(
+    "upstream_wait_seconds", "Time spent queued for an upstream rate-limit slot", ("service", "priority"))
+UPSTREAM_THROTTLED = REGISTRY.counter(
+    "upstream_throttled_total", "HTTP 429 responses that paused an upstream", ("service",))
+
+class StageTracker:
+    """Follows a sequential crew through its stages as each task callback fires."""
+
+    def __init__(self, crew: str, stages: Iterable[str]):
+        self.crew = crew
+        self.stages = list(stages)
+        self.index = 0
+        self._mark = time.perf_counter()
+
+    @property
+    def stage(self) -> str:
+        return self.stages[self.index] if self.index < len(self.stages) else "unknown"
+
+    def complete(self, stage: Optional[str] = None):
+        """Record the running stage's wall time and move on to the next one."""
+        now = time.perf_counter()
+        CREW_TASK_LATENCY.observe(now - self._mark, crew=self.crew, stage=stage or self.stage)
+        self.index += 1
+        self._mark = now
+
+_tracker: ContextVar[Optional[StageTracker]] = ContextVar("crew_stage_tracker", default=None)
+
+def current_stage() -> str:
+    tracker = _tracker.get()
+    return tracker.stage if tracker else "none"
+
+def complete_stage(stage: Optional[str] = None):
+    """Called from a task callback; a no-op outside track_crew."""
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.complete(stage)
+
+@contextmanager
+def track_crew(crew: str, stages: Iterable[str]) -> Iterator[StageTracker]:
+    """Time a crew kickoff; LLM and tool calls inside are labelled with the running stage."""
+    tracker = StageTracker(crew, stages)
+    token = _tracker.set(tracker)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield tracker
+        outcome = "ok"
+    finally:
+        _tracker.reset(token)
+        CREW_LATENCY.observe(time.perf_counter() - started, crew=crew, outcome=outcome)
+
+def instrument_tool(name: str):
+    """Decorator for tool functions; apply it below crewai's @tool so the schema is unchanged."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                TOOL_ERRORS.inc(tool=name)
+                raise
+            finally:
+                TOOL_LATENCY.observe(time.perf_counter() - started, tool=name, stage=current_stage())
+            if isinstance(result, str):
+                TOOL_OUTPUT_BYTES.observe(len(result.encode("utf-8")), tool=name)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,136 @@
+# pipeline.py
+"""Deterministic digest pipeline: a plain-Python fetch stage, then one LLM call.
+
+The agentic crew spends an LLM round-trip deciding each tool call before any
+news arrives, yet the profile already says which sectors to fetch. Here every
+preferred sector is fetched concurrently through the same cached news path the
+tools use, near-duplicates are collapsed, relevance.py pre-ranks the set, and
+the top articles go to a single summarise-and-rank prompt.
+
+DIGEST_MODE=pipeline selects it wherever digests are generated; "agentic" (the
+default) keeps NewsAICrew. Compare the two offline:
+    python -m benchmarks.e2e --mode crew --digest-mode agentic
+    python -m benchmarks.e2e --mode crew --digest-mode pipeline --compare <agentic result>
+"""
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import track_crew
+from summary_cache import SUMMARY_STYLES, summary_style
+from tools.article_format import article_registry, compact_articles, normalize_article
+from user_profile import UserProfile
+
+# "agentic" runs NewsAICrew; "pipeline" runs NewsDigestPipeline
+DIGEST_MODES = ("agentic", "pipeline")
+
+PIPELINE_STAGES = ("fetch", "digest")
+
+def fetch_profile_articles(profile: UserProfile, per_sector: int = 8) -> List[Dict[str, Any]]:
+    """Normalized articles (with ids) for every preferred sector, fetched concurrently.
+
+    Near-duplicates are collapsed across sectors. Failed sectors are logged and
+    skipped; if every sector fails the first error is raised.
+    """
+    from tools.dedup import dedup_enabled, near_duplicates
+    from tools.news_research_tool import fetch_sector_news_async, run_async
+
+    sectors = list(dict.fromkeys(industry.lower() for industry in profile.industry_preferences))
+    if not sectors:
+        return []
+    results = run_async(fetch_sector_news_async(sectors, limit=per_sector))
+    grouped, errors = {}, []
+    for sector, articles in results.items():
+        if isinstance(articles, Exception):
+            print(f"Error fetching {sector} news: {articles}")
+            errors.append(articles)
+        else:
+            grouped[sector] = articles
+    if errors and not grouped:
+        raise errors[0]
+    if dedup_enabled():
+        grouped = near_duplicates.dedupe_grouped(grouped)
+    articles = []
+    seen = set()
+    for sector_articles in grouped.values():
+        for article in sector_articles:
+            article = normalize_article(article)
+            if not article['url'] or article['url'] in seen:
+                continue
+            seen.add(article['url'])
+            article['id'] = article_registry.register(article['url'], article)
+            articles.append(article)
+    return articles
+
+def digest_prompt(profile: UserProfile, articles: List[Dict[str, Any]], max_items: int) -> str:
+    return (
+        "Prepare a personalised financial news digest from the articles below for an investor with:\n"
+        f"- Industries: {', '.join(profile.industry_preferences)}\n"
+        f"- Investment horizon: {profile.investment_horizon.value}\n"
+        f"- Risk appetite: {profile.risk_appetite.value}\n"
+        f"- Experience level: {profile.experience_level.value}\n"
+        f"- Investment frequency: {profile.investment_frequency.value}\n\n"
+        f"Pick the {max_items} most relevant articles at most and rank them from most to least relevant. "
+        "For each one give:\n"
+        "- The article id in square brackets, unchanged, followed by the title\n"
+        "- Relevance score (1-10) and priority (High/Medium/Low)\n"
+        f"- A 60-80 word summary. {SUMMARY_STYLES[summary_style(profile.experience_level)]}\n"
+        "- Key takeaway and recommended action for this investor\n"
+        "Use only these articles and do not invent any.\n\n"
+        "Articles (compact JSON: column names in \"fields\", one article per row):\n"
+        f"{compact_articles(articles)}"
+    )
+
+def _complete(prompt: str) -> str:
+    import llm
+    response = llm.llm.invoke(prompt)
+    return getattr(response, "content", None) or str(response)
+
+class NewsDigestPipeline:
+    """Drop-in for NewsAICrew: generate_news_digest(), and on_task_complete(stage, output)
+    for the "curation" (fetched articles) and "ranking" (final digest) stages.
+    """
+
+    def __init__(self, user_profile: UserProfile, on_task_complete: Optional[Callable[[str, str], None]] = None,
+                 articles_per_sector: Optional[int] = None, max_articles: Optional[int] = None,
+                 complete: Optional[Callable[[str], str]] = None):
+        self.user_profile = user_profile
+        self.on_task_complete = on_task_complete
+        self.articles_per_sector = articles_per_sector or int(os.getenv("PIPELINE_ARTICLES_PER_SECTOR", "8"))
+        # Articles handed to the LLM after local pre-ranking; bounds the prompt size
+        self.max_articles = max_articles or int(os.getenv("PIPELINE_MAX_ARTICLES", "16"))
+        self.max_items = int(os.getenv("PIPELINE_DIGEST_ITEMS", "10"))
+        self.complete = complete or _complete
+
+    def _emit(self, stage: str, text: str):
+        if self.on_task_complete:
+            self.on_task_complete(stage, article_registry.resolve(text))
+
+    def select_articles(self) -> List[Dict[str, Any]]:
+        from relevance import rank_articles
+        articles = fetch_profile_articles(self.user_profile, self.articles_per_sector)
+        return rank_articles(articles, self.user_profile)[:self.max_articles]
+
+    def generate_news_digest(self) -> str:
+        with track_crew("pipeline", PIPELINE_STAGES) as tracker:
+            articles = self.select_articles()
+            tracker.complete("fetch")
+            self._emit("curation", "\n".join(
+                f"[{article['id']}] {article['title']} ({article['source']})" for article in articles
+            ))
+            if not articles:
+                result = "No recent news found for your industries. Please check back later."
+            else:
+                result = self.complete(digest_prompt(self.user_profile, articles, self.max_items))
+            tracker.complete("digest")
+        self._emit("ranking", result)
+        return article_registry.resolve(result)
+
+def create_digest_generator(profile: UserProfile, on_task_complete: Optional[Callable[[str, str], None]] = None):
+    """NewsAICrew or NewsDigestPipeline for the profile, as chosen by DIGEST_MODE."""
+    mode = os.getenv("DIGEST_MODE", "agentic")
+    if mode == "pipeline":
+        return NewsDigestPipeline(profile, on_task_complete=on_task_complete)
+    if mode == "agentic":
+        from crew import NewsAICrew
+        return NewsAICrew(profile, on_task_complete=on_task_complete)
+    raise ValueError(f"Unknown digest mode {mode!r}, expected one of {DIGEST_MODES}")
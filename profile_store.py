@@ -0,0 +1,193 @@
+# profile_store.py
+"""Storage backends for UserProfileManager.
+
+Backends store profiles as plain dicts (UserProfile.to_dict()) keyed by user_id.
+SQLiteProfileStore is the default: O(1) upserts, primary-key lookups and safe
+concurrent access from several threads and processes thanks to WAL mode.
+JSONFileProfileStore keeps the original whole-file format for compatibility.
+
+Migrate an existing JSON file explicitly with:
+    python profile_store.py --from /tmp/user_profiles.json --to /tmp/user_profiles.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+class ProfileStore(ABC):
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def upsert(self, user_id: str, data: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def all(self) -> Iterator[Dict[str, Any]]:
+        ...
+
+    def count(self) -> int:
+        return sum(1 for _ in self.all())
+
+class JSONFileProfileStore(ProfileStore):
+    """Legacy format: one JSON object rewritten in full on every write."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        # Create the file if it doesn't exist
+        if not os.path.exists(self.path):
+            with open(self.path, 'w') as f:
+                json.dump({}, f)
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        # Write to a temp file and rename so readers never see a half-written file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._data.get(user_id)
+
+    def upsert(self, user_id: str, data: Dict[str, Any]):
+        with self._lock:
+            self._data[user_id] = data
+            self._save()
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            removed = self._data.pop(user_id, None) is not None
+            if removed:
+                self._save()
+            return removed
+
+    def all(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            return iter(list(self._data.values()))
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+class SQLiteProfileStore(ProfileStore):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS profiles (
+                       user_id TEXT PRIMARY KEY,
+                       data TEXT NOT NULL,
+                       updated_at REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_profiles_updated ON profiles(updated_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT data FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert(self, user_id: str, data: Dict[str, Any]):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """INSERT INTO profiles (user_id, data, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at""",
+                (user_id, json.dumps(data), time.time())
+            )
+
+    def upsert_many(self, profiles: Dict[str, Dict[str, Any]]):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                """INSERT INTO profiles (user_id, data, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at""",
+                [(user_id, json.dumps(data), now) for user_id, data in profiles.items()]
+            )
+
+    def delete(self, user_id: str) -> bool:
+        conn = self._connection()
+        with conn:
+            return conn.execute("DELETE FROM profiles WHERE user_id = ?", (user_id,)).rowcount > 0
+
+    def all(self) -> Iterator[Dict[str, Any]]:
+        for (data,) in self._connection().execute("SELECT data FROM profiles ORDER BY user_id"):
+            yield json.loads(data)
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+def migrate_json_to_sqlite(json_path: str, store: SQLiteProfileStore, rename: bool = True) -> int:
+    """Copy profiles from a legacy JSON file into a SQLite store. Returns the number imported.
+
+    The JSON file is renamed to *.migrated afterwards so it is not imported twice.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    store.upsert_many(data)
+    if rename:
+        try:
+            os.replace(json_path, f"{json_path}.migrated")
+        except FileNotFoundError:
+            # Another worker process migrated the same file at the same time; upserts are idempotent
+            pass
+    return len(data)
+
+def create_profile_store(path: str, legacy_json_path: Optional[str] = None) -> ProfileStore:
+    """JSON store for *.json paths, otherwise SQLite (importing legacy_json_path into a new database)."""
+    if path.endswith(".json"):
+        return JSONFileProfileStore(path)
+    store = SQLiteProfileStore(path)
+    if legacy_json_path and store.count() == 0:
+        imported = migrate_json_to_sqlite(legacy_json_path, store)
+        if imported:
+            print(f"Migrated {imported} profiles from {legacy_json_path} to {path}")
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate user profiles from the legacy JSON file to SQLite")
+    parser.add_argument("--from", dest="source", default="/tmp/user_profiles.json")
+    parser.add_argument("--to", dest="target", default="/tmp/user_profiles.db")
+    parser.add_argument("--keep", action="store_true", help="Leave the JSON file in place")
+    args = parser.parse_args()
+    imported = migrate_json_to_sqlite(args.source, SQLiteProfileStore(args.target), rename=not args.keep)
+    print(f"Migrated {imported} profiles from {args.source} to {args.target}")
+
+if __name__ == "__main__":
+    main()
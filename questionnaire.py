@@ -1,14 +1,14 @@
 # questionnaire.py
 from typing import Dict, List, Any
 from user_profile import (
-    UserProfile, UserProfileManager, 
+    UserProfile, UserProfileManager, get_profile_manager,
     InvestmentFrequency, RiskAppetite, 
     InvestmentHorizon, ExperienceLevel
 )
 
 class InvestmentQuestionnaire:
-    def __init__(self):
-        self.profile_manager = UserProfileManager()
+    def __init__(self, profile_manager: UserProfileManager = None):
+        self.profile_manager = profile_manager or get_profile_manager()
         self.questions = self._setup_questions()
     
     def _setup_questions(self) -> List[Dict[str, Any]]:
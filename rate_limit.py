@@ -0,0 +1,257 @@
+# rate_limit.py
+"""Outbound scheduling for rate-limited upstreams (Groq, NewsAPI, Yahoo).
+
+Every upstream call first takes a slot from its service's UpstreamLimiter.
+A limiter holds continuously refilled token buckets for requests per minute
+and, for Groq, LLM tokens per minute. Waiting callers are served by priority
+(interactive digests before ingestion, precompute and batch work), FIFO within
+a priority. A 429 pauses the whole service until its Retry-After has passed,
+so the callers behind it wait instead of collecting 429s of their own.
+
+Priority is ambient: wrap background work in upstream_priority(PRIORITY_BACKGROUND)
+and every upstream call made inside it, crew runs included, queues accordingly.
+
+Limits are per process; with several API workers (workers.py) each one gets an
+equal share of the configured per-minute rates.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from metrics import UPSTREAM_THROTTLED, UPSTREAM_WAIT
+from workers import web_concurrency
+
+T = TypeVar("T")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+# Back-off when a 429 carries no usable Retry-After
+DEFAULT_RETRY_AFTER = 5.0
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def upstream_priority(priority: int) -> Iterator[None]:
+    """Queue upstream calls made inside this block at the given priority (lower goes first)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+class UpstreamTimeout(RuntimeError):
+    """No upstream slot became free within the limiter's max_wait."""
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header: delta seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def throttle_delay(error: BaseException) -> Optional[float]:
+    """Back-off for an HTTP 429 error (httpx, or an SDK error carrying an httpx response); None otherwise."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    return retry_after_seconds(response.headers.get("retry-after")) or DEFAULT_RETRY_AFTER
+
+class TokenBucket:
+    """Refills at per_minute/60 per second up to capacity (default: one minute's worth)."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request bigger than the bucket waits for a full bucket rather than forever
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def adjust(self, amount: float):
+        """Give back (positive) or charge (negative) tokens after the real cost is known."""
+        self.level = min(self.capacity, self.level + amount)
+
+class UpstreamLimiter:
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = 0,
+                 max_wait: float = 120, max_retries: int = 3):
+        """A rate of 0 disables that bucket."""
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._changed = threading.Condition()
+        self.granted = 0
+        self.timeouts = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _wait_needed(self, tokens: float, now: float) -> float:
+        wait = self.paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def acquire(self, tokens: float = 0, priority: Optional[int] = None) -> float:
+        """Block until this caller is first in line and the buckets allow it. Returns seconds waited.
+
+        Raises UpstreamTimeout after max_wait.
+        """
+        priority = current_priority() if priority is None else priority
+        ticket = (priority, next(self._sequence))
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        with self._changed:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] == ticket:
+                        wait = self._wait_needed(tokens, now)
+                        if wait <= 0:
+                            if self.requests is not None:
+                                self.requests.take(1)
+                            if self.tokens is not None and tokens:
+                                self.tokens.take(tokens)
+                            break
+                    if now >= deadline:
+                        self.timeouts += 1
+                        raise UpstreamTimeout(f"{self.name}: no upstream slot within {self.max_wait:g}s")
+                    # Non-head waiters sleep until the queue changes
+                    self._changed.wait(min(wait, deadline - now) if wait is not None else deadline - now)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._changed.notify_all()
+            waited = time.monotonic() - started
+            self.granted += 1
+            self.wait_seconds += waited
+        UPSTREAM_WAIT.observe(waited, service=self.name, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        return waited
+
+    def settle(self, reserved: float, used: Optional[float]):
+        """Correct the token bucket once the call reports what it really cost."""
+        if self.tokens is None or used is None:
+            return
+        with self._changed:
+            self.tokens.adjust(reserved - used)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for seconds (a 429's Retry-After)."""
+        with self._changed:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._changed.notify_all()
+        UPSTREAM_THROTTLED.inc(service=self.name)
+
+    def call(self, fn: Callable[[], T], tokens: float = 0,
+             used_tokens: Optional[Callable[[T], Optional[float]]] = None) -> T:
+        """Run fn in a slot, pausing and retrying on 429 up to max_retries times."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = throttle_delay(e)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                self.pause(delay)
+                continue
+            if used_tokens is not None:
+                self.settle(tokens, used_tokens(result))
+            return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]], tokens: float = 0,
+                         used_tokens: Optional[Callable[[T], Optional[float]]] = None) -> T:
+        for attempt in range(self.max_retries + 1):
+            # Waiting blocks, so it happens on a worker thread (the context, and so the priority, goes along)
+            await asyncio.to_thread(self.acquire, tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = throttle_delay(e)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                self.pause(delay)
+                continue
+            if used_tokens is not None:
+                self.settle(tokens, used_tokens(result))
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            now = time.monotonic()
+            stats = {
+                'queue_depth': len(self._queue),
+                'paused_seconds': round(max(0.0, self.paused_until - now), 3),
+                'granted': self.granted,
+                'timeouts': self.timeouts,
+                'throttled': self.throttled,
+                'avg_wait_ms': round(self.wait_seconds / self.granted * 1000, 3) if self.granted else 0.0
+            }
+            if self.requests is not None:
+                self.requests._refill(now)
+                stats['requests_available'] = round(self.requests.level, 2)
+            if self.tokens is not None:
+                self.tokens._refill(now)
+                stats['tokens_available'] = round(self.tokens.level)
+            return stats
+
+def _limiter(name: str, env_prefix: str, requests_per_minute: float, tokens_per_minute: float = 0) -> UpstreamLimiter:
+    # The account-wide rate is shared by every worker process
+    workers = web_concurrency()
+    return UpstreamLimiter(
+        name,
+        requests_per_minute=float(os.getenv(f"{env_prefix}_REQUESTS_PER_MINUTE", str(requests_per_minute))) / workers,
+        tokens_per_minute=float(os.getenv(f"{env_prefix}_TOKENS_PER_MINUTE", str(tokens_per_minute))) / workers,
+        max_wait=float(os.getenv("UPSTREAM_MAX_WAIT", "120")),
+        max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+    )
+
+# Groq's default follows its free tier for llama3-70b. NewsAPI plans are metered per day, not per minute
+# (the developer plan allows 100 requests a day), so its 30/min only smooths bursts; the daily quota is not
+# enforced here and runs out as 429s, which pause the limiter. Raise both for paid plans.
+groq_limiter = _limiter("groq", "GROQ", 30, 6000)
+newsapi_limiter = _limiter("newsapi", "NEWSAPI", 30)
+yahoo_limiter = _limiter("yahoo", "YAHOO", 60)
+
+LIMITERS = {limiter.name: limiter for limiter in (groq_limiter, newsapi_limiter, yahoo_limiter)}
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in LIMITERS.items()}
@@ -0,0 +1,240 @@
+# relevance.py
+"""Deterministic, vectorized article relevance scoring.
+
+Articles become term-count vectors over a fixed vocabulary built from
+INDUSTRY_KEYWORDS plus small risk and horizon lexicons; profiles become
+industry weights and risk/horizon leans. Whole batches are scored with a few
+NumPy array operations, so ranking needs no LLM call and is reproducible.
+"""
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.article_format import ARTICLE_ID_PATTERN, article_registry
+from user_profile import (
+    UserProfile, InvestmentFrequency, InvestmentHorizon, RiskAppetite, INDUSTRY_KEYWORDS
+)
+
+RISK_TERMS = {
+    'defensive': ['dividend', 'stable', 'defensive', 'yield', 'utilities', 'blue chip', 'bond', 'treasury', 'guidance'],
+    'aggressive': ['growth', 'surge', 'soar', 'rally', 'plunge', 'volatility', 'volatile', 'startup', 'ipo',
+                   'venture', 'crypto', 'speculative', 'breakthrough', 'trial']
+}
+
+HORIZON_TERMS = {
+    'near': ['today', 'week', 'quarter', 'quarterly', 'earnings', 'premarket', 'intraday', 'trading', 'shares',
+             'forecast', 'beat', 'estimates'],
+    'far': ['outlook', 'strategy', 'decade', 'years', 'long-term', 'infrastructure', 'invest', 'investment',
+            'capacity', 'expansion', 'fundamental']
+}
+
+# How much each risk appetite leans towards aggressive (+1) or defensive (-1) news
+RISK_LEAN = {
+    RiskAppetite.LOW: -1.0,
+    RiskAppetite.MEDIUM: 0.0,
+    RiskAppetite.HIGH: 0.6,
+    RiskAppetite.VERY_HIGH: 1.0
+}
+
+HORIZON_LEAN = {
+    InvestmentHorizon.SHORT_TERM: -1.0,
+    InvestmentHorizon.MEDIUM_TERM: 0.0,
+    InvestmentHorizon.LONG_TERM: 1.0
+}
+
+# Recency half-life in hours; daily traders care about hours, yearly investors about months
+RECENCY_HALF_LIFE_HOURS = {
+    InvestmentFrequency.DAILY: 12,
+    InvestmentFrequency.WEEKLY: 72,
+    InvestmentFrequency.MONTHLY: 240,
+    InvestmentFrequency.QUARTERLY: 720,
+    InvestmentFrequency.YEARLY: 2160
+}
+
+WEIGHTS = {'industry': 0.6, 'risk': 0.12, 'horizon': 0.12, 'recency': 0.16}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_MAX_NGRAM = 3
+
+def _tokens(text: str) -> List[str]:
+    return [token[:-1] if len(token) > 3 and token.endswith('s') else token
+            for token in _TOKEN.findall((text or "").lower())]
+
+def _term_key(term: str) -> Tuple[str, ...]:
+    return tuple(_tokens(term))
+
+class Vocabulary:
+    """Fixed term index shared by article and profile vectors."""
+
+    def __init__(self):
+        self.index: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+        self.industry_columns: Dict[str, List[int]] = {}
+        for industry, keywords in INDUSTRY_KEYWORDS.items():
+            self.industry_columns[industry] = [self._add(term) for term in [industry.replace('_', ' ')] + keywords]
+        self.risk_columns = {lean: [self._add(term) for term in terms] for lean, terms in RISK_TERMS.items()}
+        self.horizon_columns = {lean: [self._add(term) for term in terms] for lean, terms in HORIZON_TERMS.items()}
+
+    def _add(self, term: str) -> int:
+        return self.index.setdefault(_term_key(term), len(self.index))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def industry_terms(self, industry: str) -> List[int]:
+        industry = industry.lower()
+        if industry not in self.industry_columns:
+            with self._lock:
+                if industry not in self.industry_columns:
+                    self.industry_columns[industry] = [self._add(industry.replace('_', ' '))]
+        return self.industry_columns[industry]
+
+    def vectorize(self, texts: Sequence[str]) -> np.ndarray:
+        """Term-count matrix of shape (len(texts), len(vocabulary))."""
+        width = len(self.index)
+        matrix = np.zeros((len(texts), width), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _tokens(text)
+            for size in range(1, _MAX_NGRAM + 1):
+                for start in range(len(tokens) - size + 1):
+                    column = self.index.get(tuple(tokens[start:start + size]))
+                    if column is not None and column < width:
+                        matrix[row, column] += 1.0
+        return matrix
+
+VOCABULARY = Vocabulary()
+
+def _article_text(article: Dict[str, Any]) -> str:
+    # Title counts twice: it is the strongest signal of what the story is about
+    return f"{article.get('title', '')} {article.get('title', '')} {article.get('description', '')}"
+
+def _parse_published(value: Any) -> Optional[datetime]:
+    if isinstance(value, (int, float)) and value:
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if not value:
+        return None
+    try:
+        published = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return published if published.tzinfo else published.replace(tzinfo=timezone.utc)
+
+def _age_hours(articles: Sequence[Dict[str, Any]], now: datetime) -> np.ndarray:
+    ages = []
+    for article in articles:
+        published = _parse_published(article.get('published_at') or article.get('published'))
+        ages.append((now - published).total_seconds() / 3600 if published else np.nan)
+    return np.array(ages, dtype=np.float32)
+
+def score_articles(articles: Sequence[Dict[str, Any]], profiles: Sequence[UserProfile],
+                   now: Optional[datetime] = None) -> np.ndarray:
+    """Relevance of every article for every profile as a (profiles, articles) matrix on a 1-10 scale."""
+    if not articles or not profiles:
+        return np.zeros((len(profiles), len(articles)), dtype=np.float32)
+    now = now or datetime.now(timezone.utc)
+    vocabulary = VOCABULARY
+
+    for profile in profiles:
+        for industry in profile.industry_preferences:
+            vocabulary.industry_terms(industry)
+    counts = vocabulary.vectorize([_article_text(article) for article in articles])
+    present = np.minimum(counts, 1.0)
+
+    # Industry: fraction of a profile's industries the article touches, damped by keyword hits
+    industry_names = sorted({industry.lower() for profile in profiles for industry in profile.industry_preferences})
+    if industry_names:
+        industry_hits = np.stack([counts[:, vocabulary.industry_terms(name)].sum(axis=1) for name in industry_names], axis=1)
+        industry_match = 1.0 - np.exp(-industry_hits)  # (articles, industries) in [0, 1)
+        membership = np.zeros((len(profiles), len(industry_names)), dtype=np.float32)
+        for row, profile in enumerate(profiles):
+            for industry in profile.industry_preferences:
+                membership[row, industry_names.index(industry.lower())] = 1.0
+        membership /= np.maximum(membership.sum(axis=1, keepdims=True), 1.0)
+        industry_score = membership @ industry_match.T  # (profiles, articles)
+        # Reward matching any one preferred industry strongly, not only spreading across all of them
+        best_industry = (membership > 0).astype(np.float32)[:, None, :] * industry_match[None, :, :]
+        industry_score = 0.5 * industry_score + 0.5 * best_industry.max(axis=2)
+    else:
+        # No profile names an industry: the term is flat and the other factors decide the order
+        industry_score = np.zeros((len(profiles), len(articles)), dtype=np.float32)
+
+    # Risk and horizon: article lean in [-1, 1] compared with the profile's lean
+    def lean(columns: Dict[str, List[int]], positive: str, negative: str) -> np.ndarray:
+        pos = present[:, columns[positive]].sum(axis=1)
+        neg = present[:, columns[negative]].sum(axis=1)
+        return (pos - neg) / np.maximum(pos + neg, 1.0)
+
+    article_risk = lean(vocabulary.risk_columns, 'aggressive', 'defensive')
+    article_horizon = lean(vocabulary.horizon_columns, 'far', 'near')
+    profile_risk = np.array([RISK_LEAN[p.risk_appetite] for p in profiles], dtype=np.float32)
+    profile_horizon = np.array([HORIZON_LEAN[p.investment_horizon] for p in profiles], dtype=np.float32)
+    risk_score = 1.0 - np.abs(profile_risk[:, None] - article_risk[None, :]) / 2.0
+    horizon_score = 1.0 - np.abs(profile_horizon[:, None] - article_horizon[None, :]) / 2.0
+
+    # Recency: exponential decay with a half-life set by investment frequency; unknown dates score 0.5
+    ages = _age_hours(articles, now)
+    half_lives = np.array([RECENCY_HALF_LIFE_HOURS[p.investment_frequency] for p in profiles], dtype=np.float32)
+    recency = np.power(0.5, np.clip(ages, 0, None)[None, :] / half_lives[:, None])
+    recency = np.where(np.isnan(recency), 0.5, recency)
+
+    combined = (
+        WEIGHTS['industry'] * industry_score
+        + WEIGHTS['risk'] * risk_score
+        + WEIGHTS['horizon'] * horizon_score
+        + WEIGHTS['recency'] * recency
+    )
+    return np.round(1.0 + 9.0 * combined.astype(np.float64), 2)
+
+def priority(score: float) -> str:
+    if score >= 7.0:
+        return "High"
+    if score >= 4.0:
+        return "Medium"
+    return "Low"
+
+def rank_articles(articles: Sequence[Dict[str, Any]], profile: UserProfile,
+                  now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Articles sorted by relevance for one profile, each with 'relevance_score' and 'priority' added."""
+    scores = score_articles(articles, [profile], now=now)[0]
+    order = np.argsort(-scores, kind='stable')
+    return [
+        dict(articles[i], relevance_score=float(scores[i]), priority=priority(float(scores[i])))
+        for i in order
+    ]
+
+def split_by_article(text: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split crew output into a preamble and one block per article id, in order of appearance."""
+    preamble = ""
+    blocks: List[List[str]] = []
+    seen = set()
+    for line in text.splitlines(keepends=True):
+        match = ARTICLE_ID_PATTERN.search(line)
+        if match and match.group(1) not in seen:
+            seen.add(match.group(1))
+            blocks.append([match.group(1), line])
+        elif blocks:
+            blocks[-1][1] += line
+        else:
+            preamble += line
+    return preamble, [(article_id, block) for article_id, block in blocks]
+
+def rank_summaries(summaries: str, profile: UserProfile, now: Optional[datetime] = None) -> str:
+    """Reorder per-article summaries by local relevance score and annotate each one.
+
+    Used in place of the relevance scoring crew task. Articles are recovered from
+    the ids the tools handed out; output without ids is returned unchanged.
+    """
+    preamble, blocks = split_by_article(summaries)
+    if not blocks:
+        return summaries
+    articles = [article_registry.get_article(article_id) or {'id': article_id} for article_id, _ in blocks]
+    scores = score_articles(articles, [profile], now=now)[0]
+    ranked = []
+    for i in np.argsort(-scores, kind='stable'):
+        score = float(scores[i])
+        block = blocks[i][1].rstrip("\n")
+        ranked.append(f"Relevance score: {score:.1f}/10 ({priority(score)} priority)\n{block}\n")
+    return preamble + "\n".join(ranked)
@@ -0,0 +1,337 @@
+# summary_cache.py
+"""Article summaries shared across users, one per (article URL, style, day).
+
+Of the profile fields, only experience_level changes how an article is
+summarised, so summaries are generated per style variant rather than per user
+and kept in SQLite. A digest is assembled from cached summaries and the LLM is
+only asked about articles nobody with the same style has needed today, several
+articles per call. Profile-specific ranking still happens after assembly.
+
+Fill the cache for the day's top articles ahead of demand:
+    python summary_cache.py --per-sector 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from tools.article_format import ARTICLE_ID_PATTERN, article_registry, normalize_article
+from user_profile import ExperienceLevel
+
+SUMMARY_STYLES = {
+    "beginner": (
+        "Use simple language, explain technical terms, and provide context "
+        "for market concepts. Focus on what this means for a new investor."
+    ),
+    "expert": (
+        "Use precise financial terminology, focus on technical analysis, "
+        "market implications, and advanced insights. Assume deep market knowledge."
+    ),
+    "standard": (
+        "Balance technical accuracy with accessibility, explain key terms "
+        "when necessary, and focus on actionable insights."
+    )
+}
+
+def summary_style(experience_level: ExperienceLevel) -> str:
+    """Style variant for an experience level; intermediate and advanced share the default."""
+    if experience_level == ExperienceLevel.BEGINNER:
+        return "beginner"
+    if experience_level == ExperienceLevel.EXPERT:
+        return "expert"
+    return "standard"
+
+def summary_prompt(articles: Sequence[Dict[str, Any]], style: str) -> str:
+    lines = [
+        f"[{article['id']}] {article.get('title', '')} ({article.get('source', '')}, "
+        f"{article.get('published', '')}): {article.get('description', '')}"
+        for article in articles
+    ]
+    return (
+        "Summarise each financial news article below in 60-80 words. "
+        f"{SUMMARY_STYLES[style]} "
+        "Each summary must be standalone and must not assume a particular investor profile.\n"
+        "Start every summary on a new line with the article id in square brackets, unchanged "
+        "(e.g. [a1b2c3d4e5f6a]), and write nothing else.\n\n"
+        "Articles:\n" + "\n".join(lines)
+    )
+
+def parse_summaries(text: str, article_ids: Iterable[str]) -> Dict[str, str]:
+    """Summary text per requested article id; ids the model did not answer are missing."""
+    wanted = set(article_ids)
+    blocks: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in text.splitlines():
+        match = ARTICLE_ID_PATTERN.search(line)
+        if match and match.group(1) in wanted and match.group(1) not in blocks:
+            current = match.group(1)
+            blocks[current] = [line[match.end():]]
+        elif current is not None:
+            blocks[current].append(line)
+    summaries = {}
+    for article_id, lines in blocks.items():
+        summary = " ".join(" ".join(lines).split()).lstrip(":-– ").strip()
+        if summary:
+            summaries[article_id] = summary
+    return summaries
+
+def _complete(prompt: str) -> str:
+    # Imported here so the pre-summarisation job and the API stay light until a summary is needed
+    import llm
+    response = llm.llm.invoke(prompt)
+    return getattr(response, "content", None) or str(response)
+
+def assemble_summaries(article_ids: Sequence[str], summaries: Dict[str, str]) -> str:
+    """Summaries stage text: one block per article, led by its bracketed id.
+
+    Articles without a summary fall back to their description, which is not cached.
+    """
+    blocks = []
+    for article_id in article_ids:
+        article = article_registry.get_article(article_id) or {}
+        summary = summaries.get(article_id) or " ".join((article.get('description') or "").split())
+        heading = f"[{article_id}] {article.get('title') or 'Untitled'}"
+        if article.get('source'):
+            heading += f" ({article['source']})"
+        blocks.append(f"{heading}\n{summary}\n")
+    return "\n".join(blocks)
+
+def summary_key(article: Dict[str, Any]) -> str:
+    """Storage key for an article: a full SHA-256 of its URL.
+
+    Short article ids are only unique within one process's registry; the cache is
+    shared between processes and days, so it must not key on them.
+    """
+    return hashlib.sha256((article.get('url') or article['id']).encode("utf-8")).hexdigest()
+
+def article_ids_in(text: str) -> List[str]:
+    """Bracketed article ids in order of first appearance."""
+    return list(dict.fromkeys(ARTICLE_ID_PATTERN.findall(text)))
+
+class SummaryCache:
+    """SQLite-backed summaries with in-process single-flight per (article URL, style, day).
+
+    When two digests need the same missing summary at once, one of them asks the
+    LLM and the other waits for the stored result.
+    """
+
+    def __init__(self, path: str, retention_days: float = 2, batch_size: int = 12,
+                 wait_timeout: float = 120, complete: Optional[Callable[[str], str]] = None):
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.wait_timeout = wait_timeout
+        self.complete = complete or _complete
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[str, str, str], threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.generated = 0
+        self.llm_calls = 0
+        self.llm_errors = 0
+        with self._connection() as conn:
+            # Rows of the old table were keyed by short article ids, which can collide
+            conn.execute("DROP TABLE IF EXISTS summaries")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS url_summaries (
+                       url_hash TEXT NOT NULL,
+                       style TEXT NOT NULL,
+                       day TEXT NOT NULL,
+                       summary TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       PRIMARY KEY (url_hash, style, day)
+                   )"""
+            )
+        self.prune()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def get_many(self, keys: Sequence[str], style: str, day: Optional[str] = None) -> Dict[str, str]:
+        """Stored summaries by summary_key()."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT url_hash, summary FROM url_summaries WHERE style = ? AND day = ? AND url_hash IN ({placeholders})",
+            (style, day or self.today(), *keys)
+        ).fetchall()
+        return dict(rows)
+
+    def put_many(self, summaries: Dict[str, str], style: str, day: Optional[str] = None):
+        """Store summaries keyed by summary_key()."""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO url_summaries (url_hash, style, day, summary, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, style, day or self.today(), summary, now) for key, summary in summaries.items()]
+            )
+
+    def _claim(self, keys: Sequence[str], style: str, day: str) -> Tuple[List[str], List[Tuple[str, threading.Event]]]:
+        claimed, waiting = [], []
+        with self._lock:
+            for key in keys:
+                event = self._in_flight.get((key, style, day))
+                if event is None:
+                    self._in_flight[(key, style, day)] = threading.Event()
+                    claimed.append(key)
+                else:
+                    waiting.append((key, event))
+        return claimed, waiting
+
+    def _release(self, keys: Sequence[str], style: str, day: str):
+        with self._lock:
+            for key in keys:
+                self._in_flight.pop((key, style, day)).set()
+
+    def _generate(self, articles: Sequence[Dict[str, Any]], style: str) -> Dict[str, str]:
+        """Summaries by summary_key() for one batch; the prompt refers to articles by id."""
+        with self._lock:
+            self.llm_calls += 1
+        try:
+            text = self.complete(summary_prompt(articles, style))
+        except Exception as e:
+            print(f"Error summarising {len(articles)} articles: {e}")
+            with self._lock:
+                self.llm_errors += 1
+            return {}
+        summaries = parse_summaries(text, [article['id'] for article in articles])
+        return {summary_key(article): summaries[article['id']] for article in articles if article['id'] in summaries}
+
+    def summaries_for(self, articles: Sequence[Dict[str, Any]], style: str) -> Dict[str, str]:
+        """Summary per article id (articles carry 'id'), generating only what today's cache lacks.
+
+        Articles the LLM failed to summarise are left out and retried on the next request.
+        """
+        if style not in SUMMARY_STYLES:
+            raise ValueError(f"Unknown summary style {style!r}, expected one of {tuple(SUMMARY_STYLES)}")
+        day = self.today()
+        by_key = {summary_key(article): article for article in articles}
+        found = self.get_many(list(by_key), style, day)
+        missing = [key for key in by_key if key not in found]
+        claimed, waiting = self._claim(missing, style, day)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(claimed)
+            self.coalesced += len(waiting)
+        try:
+            for start in range(0, len(claimed), self.batch_size):
+                generated = self._generate([by_key[key] for key in claimed[start:start + self.batch_size]], style)
+                if generated:
+                    self.put_many(generated, style, day)
+                    found.update(generated)
+                    with self._lock:
+                        self.generated += len(generated)
+        finally:
+            self._release(claimed, style, day)
+        for _, event in waiting:
+            event.wait(self.wait_timeout)
+        if waiting:
+            found.update(self.get_many([key for key, _ in waiting], style, day))
+        return {by_key[key]['id']: summary for key, summary in found.items()}
+
+    def prune(self) -> int:
+        """Drop summaries older than the retention window."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        conn = self._connection()
+        with conn:
+            return conn.execute("DELETE FROM url_summaries WHERE day < ?", (cutoff,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            "SELECT style, COUNT(*) FROM url_summaries WHERE day = ? GROUP BY style", (self.today(),)
+        ).fetchall()
+        with self._lock:
+            requested = self.hits + self.misses + self.coalesced
+            return {
+                'path': self.path,
+                'today': dict(rows),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': self.hits / requested if requested else 0.0,
+                'generated': self.generated,
+                'llm_calls': self.llm_calls,
+                'llm_errors': self.llm_errors
+            }
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+def get_summary_cache() -> SummaryCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SummaryCache(
+                    path=os.getenv("SUMMARY_CACHE_PATH", "/tmp/article_summaries.db"),
+                    retention_days=float(os.getenv("SUMMARY_CACHE_RETENTION_DAYS", "2")),
+                    batch_size=int(os.getenv("SUMMARY_BATCH_SIZE", "12"))
+                )
+    return _cache
+
+def top_articles(sectors: Sequence[str], per_sector: int = 8) -> List[Dict[str, Any]]:
+    """Newest articles published today in each sector, registered so they carry article ids."""
+    from tools.article_store import get_article_store
+    store = get_article_store()
+    if store is None:
+        return []
+    since = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    articles: Dict[str, Dict[str, Any]] = {}
+    for sector in sectors:
+        for row in store.search(sector=sector, since=since, limit=per_sector):
+            article = normalize_article(row)
+            article['id'] = article_registry.register(article['url'], article)
+            articles.setdefault(article['id'], article)
+    return list(articles.values())
+
+def presummarize(sectors: Sequence[str], per_sector: int = 8, styles: Optional[Sequence[str]] = None,
+                 cache: Optional[SummaryCache] = None) -> Dict[str, Any]:
+    """Summarise the day's top articles in every style so digests find them cached."""
+    cache = cache or get_summary_cache()
+    articles = top_articles(sectors, per_sector)
+    started = time.time()
+    summarised = {}
+    with upstream_priority(PRIORITY_BACKGROUND):
+        for style in styles or SUMMARY_STYLES:
+            summarised[style] = len(cache.summaries_for(articles, style))
+    return {'articles': len(articles), 'summarised': summarised,
+            'elapsed_seconds': round(time.time() - started, 2), **cache.stats()}
+
+def main():
+    from dotenv import load_dotenv
+    from ingestion import questionnaire_sectors
+    from questionnaire import InvestmentQuestionnaire
+    from user_profile import get_profile_manager
+
+    parser = argparse.ArgumentParser(description="Pre-summarise today's top articles for every summary style")
+    parser.add_argument("--per-sector", type=int, default=8, help="Newest articles per sector to summarise")
+    parser.add_argument("--styles", help=f"Comma-separated subset of {','.join(SUMMARY_STYLES)}")
+    args = parser.parse_args()
+    load_dotenv()
+
+    sectors = questionnaire_sectors(InvestmentQuestionnaire(get_profile_manager()))
+    styles = [style.strip() for style in args.styles.split(",")] if args.styles else None
+    print(json.dumps(presummarize(sectors, args.per_sector, styles), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 # tasks/news_curation_task.py
-from crewai import Task
+from typing import Dict, Optional
+from crewai import Agent, Task
 from agents.news_curator_agent import create_news_curator_agent, relevance_scorer_agent
 from user_profile import UserProfile
+from summary_cache import SUMMARY_STYLES, summary_style as summary_style_variant
 
-def create_news_curation_task(user_profile: UserProfile) -> Task:
-    """Create a personalized news curation task based on user profile"""
+def news_curation_task_spec(user_profile: UserProfile, article_count: str = "8-12") -> Dict[str, str]:
+    """Description and expected output of the curation task for this profile"""
     
     # Build sector keywords from user preferences
     sector_keywords = " OR ".join(user_profile.industry_preferences)
@@ -23,50 +25,42 @@ def create_news_curation_task(user_profile: UserProfile) -> Task:
         "recent market developments"
     )
     
-    curator_agent = create_news_curator_agent(user_profile)
-    
-    return Task(
+    return dict(
         description=(
             f"Fetch and curate financial news articles focusing on {sector_keywords} sectors. "
             f"Prioritize {time_context} that align with {user_profile.investment_horizon.value} "
             f"investment strategy and {user_profile.risk_appetite.value} risk tolerance. "
             f"Consider the user's {user_profile.experience_level.value} experience level when "
-            f"selecting and presenting information. Find 8-12 relevant articles."
+            f"selecting and presenting information. Find {article_count} relevant articles."
         ),
         expected_output=(
-            "A curated list of 8-12 financial news articles with:\n"
+            f"A curated list of {article_count} financial news articles with:\n"
+            "- Article id exactly as returned by the tools, in square brackets (e.g. [a1b2c3d4e5f6a])\n"
             "- Article title and source\n"
             "- Brief description\n"
             "- Relevance score (1-10)\n"
             "- Key tags (sector, risk level, time relevance)"
-        ),
-        agent=curator_agent
+        )
+    )
+
+def create_news_curation_task(user_profile: UserProfile, agent: Optional[Agent] = None,
+                              article_count: str = "8-12") -> Task:
+    """Create a personalized news curation task based on user profile"""
+    return Task(
+        **news_curation_task_spec(user_profile, article_count),
+        agent=agent or create_news_curator_agent(user_profile)
     )
 
 # tasks/news_summarization_task.py
 from agents.news_curator_agent import summarizer_agent
 
-def create_summarization_task(user_profile: UserProfile) -> Task:
-    """Create a news summarization task tailored to user profile"""
+def summarization_task_spec(user_profile: UserProfile) -> Dict[str, str]:
+    """Description and expected output of the summarization task for this profile"""
     
-    # Adjust summary style based on experience level
-    if user_profile.experience_level.value == "beginner":
-        summary_style = (
-            "Use simple language, explain technical terms, and provide context "
-            "for market concepts. Focus on what this means for a new investor."
-        )
-    elif user_profile.experience_level.value == "expert":
-        summary_style = (
-            "Use precise financial terminology, focus on technical analysis, "
-            "market implications, and advanced insights. Assume deep market knowledge."
-        )
-    else:
-        summary_style = (
-            "Balance technical accuracy with accessibility, explain key terms "
-            "when necessary, and focus on actionable insights."
-        )
+    # Summary style varies only with experience level (shared with summary_cache)
+    summary_style = SUMMARY_STYLES[summary_style_variant(user_profile.experience_level)]
     
-    return Task(
+    return dict(
         description=(
             f"Transform the curated news articles into 60-80 word summaries. "
             f"{summary_style} "
@@ -76,19 +70,23 @@ def create_summarization_task(user_profile: UserProfile) -> Task:
         ),
         expected_output=(
             "For each article, provide:\n"
+            "- The article id in square brackets, unchanged\n"
             "- 60-80 word summary\n"
             "- Key takeaway for the user's investment profile\n"
             "- Action items (if any)\n"
             "- Risk/opportunity indicators"
-        ),
-        agent=summarizer_agent
+        )
     )
 
+def create_summarization_task(user_profile: UserProfile) -> Task:
+    """Create a news summarization task tailored to user profile"""
+    return Task(**summarization_task_spec(user_profile), agent=summarizer_agent)
+
 # tasks/relevance_scoring_task.py
-def create_relevance_scoring_task(user_profile: UserProfile) -> Task:
-    """Create a task to score article relevance based on user profile"""
+def relevance_scoring_task_spec(user_profile: UserProfile) -> Dict[str, str]:
+    """Description and expected output of the relevance scoring task for this profile"""
     
-    return Task(
+    return dict(
         description=(
             f"Score the relevance of each news article based on the user's profile:\n"
             f"- Industries: {', '.join(user_profile.industry_preferences)}\n"
@@ -100,10 +98,14 @@ def create_relevance_scoring_task(user_profile: UserProfile) -> Task:
         ),
         expected_output=(
             "A ranked list of articles with:\n"
+            "- The article id in square brackets, unchanged\n"
             "- Relevance score (1-10)\n"
             "- Relevance reasoning\n"
             "- Priority level (High/Medium/Low)\n"
             "- Recommended action for this user type"
-        ),
-        agent=relevance_scorer_agent
-    )
\ No newline at end of file
+        )
+    )
+
+def create_relevance_scoring_task(user_profile: UserProfile) -> Task:
+    """Create a task to score article relevance based on user profile"""
+    return Task(**relevance_scoring_task_spec(user_profile), agent=relevance_scorer_agent)
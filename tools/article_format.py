@@ -0,0 +1,145 @@
+# tools/article_format.py
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from tools.dedup import dedup_enabled, near_duplicates
+
+# Column order of the compact tool payload; keep stable, prompts refer to it
+COMPACT_FIELDS = ["id", "title", "source", "published", "desc"]
+
+# 48 bits: collisions stay negligible at the registry's size; the few that occur become misses (register())
+ARTICLE_ID_HEX_DIGITS = 12
+ARTICLE_ID_PATTERN = re.compile(r"\[(a[0-9a-f]{12})\]")
+
+class ArticleRegistry:
+    """Maps short article ids back to URLs so the LLM never sees full links.
+
+    The normalized article is kept alongside the URL so post-crew stages can
+    recover what an id refers to. Ids depend on the URL alone, so every process
+    gives an article the same id.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        # None marks an id two URLs hashed to; it resolves to nothing rather than to the wrong link
+        self._articles: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def article_id(url: str) -> str:
+        return "a" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:ARTICLE_ID_HEX_DIGITS]
+
+    def register(self, url: str, article: Optional[Dict[str, Any]] = None) -> str:
+        article_id = self.article_id(url)
+        with self._lock:
+            if article_id in self._articles and (self._articles[article_id] or {}).get('url') != url:
+                # Hash collision (or an id already marked as one): neither URL can be linked safely
+                if self._articles[article_id] is not None:
+                    print(f"Article id collision on {article_id}: {self._articles[article_id]['url']} and {url}")
+                self._articles[article_id] = None
+            else:
+                self._articles[article_id] = dict(article or {}, url=url, id=article_id)
+            self._articles.move_to_end(article_id)
+            while len(self._articles) > self.max_entries:
+                self._articles.popitem(last=False)
+        return article_id
+
+    def get_article(self, article_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._articles.get(article_id)
+
+    def lookup(self, article_id: str) -> Optional[str]:
+        article = self.get_article(article_id)
+        return article['url'] if article else None
+
+    def resolve(self, text: str) -> str:
+        """Replace [a<12 hex digits>] references in crew output with the article URLs."""
+        def replace(match):
+            url = self.lookup(match.group(1))
+            return f"[{match.group(1)}]({url})" if url else match.group(0)
+        return ARTICLE_ID_PATTERN.sub(replace, text)
+
+article_registry = ArticleRegistry()
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = " ".join((text or "").split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+def _published(value: Any) -> str:
+    # NewsAPI gives ISO strings, yfinance gives epoch seconds; both become minute precision UTC
+    if isinstance(value, (int, float)) and value:
+        return datetime.fromtimestamp(value, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M")
+    return str(value or "")[:16]
+
+def normalize_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """Map NewsAPI and yfinance article dicts onto one schema."""
+    return {
+        'url': article.get('url') or article.get('link', ''),
+        'title': article.get('title', ''),
+        'source': article.get('source') or article.get('publisher', ''),
+        'published': _published(article.get('published_at') or article.get('published')),
+        'description': article.get('description', ''),
+        # Outlets whose near-duplicate copies were folded into this article (tools/dedup.py)
+        'also_reported_by': article.get('also_reported_by', [])
+    }
+
+def _source_cell(article: Dict[str, Any]) -> str:
+    if not article['also_reported_by']:
+        return article['source']
+    return f"{article['source']} (also: {', '.join(article['also_reported_by'])})"
+
+def compact_payload(articles: List[Dict[str, Any]], description_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Columnar form of an article list: {"fields": [...], "rows": [[...], ...]}."""
+    if description_chars is None:
+        description_chars = int(os.getenv("TOOL_DESCRIPTION_CHARS", "160"))
+    rows = []
+    for article in articles:
+        article = normalize_article(article)
+        article_id = article_registry.register(article['url'], article) if article['url'] else ""
+        rows.append([
+            article_id,
+            article['title'],
+            _source_cell(article),
+            article['published'],
+            _truncate(article['description'], description_chars)
+        ])
+    return {"fields": COMPACT_FIELDS, "rows": rows}
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+def compact_articles(articles: List[Dict[str, Any]], description_chars: Optional[int] = None) -> str:
+    return _dumps(compact_payload(articles, description_chars))
+
+def _legacy_format() -> bool:
+    return os.getenv("TOOL_OUTPUT_FORMAT", "compact") == "repr"
+
+def format_articles(articles: List[Dict[str, Any]]) -> str:
+    """Tool payload in the configured format, near-duplicates collapsed (DEDUP_ENABLED=0 keeps them).
+
+    TOOL_OUTPUT_FORMAT=repr restores the old output.
+    """
+    if dedup_enabled():
+        articles = near_duplicates.dedupe(articles)
+    if _legacy_format():
+        return str(articles)
+    return compact_articles(articles)
+
+def format_grouped_articles(grouped: Dict[str, Union[List[Dict[str, Any]], str]]) -> str:
+    """Like format_articles for {group: articles}; string values (errors) pass through."""
+    if dedup_enabled():
+        grouped = near_duplicates.dedupe_grouped(grouped)
+    if _legacy_format():
+        return str(grouped)
+    return _dumps({
+        group: articles if isinstance(articles, str) else compact_payload(articles)
+        for group, articles in grouped.items()
+    })
@@ -0,0 +1,247 @@
+# tools/article_store.py
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    published_at TEXT NOT NULL DEFAULT '',
+    sector TEXT,
+    symbol TEXT,
+    kind TEXT NOT NULL DEFAULT '',
+    origin TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_sector ON articles(sector, published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_symbol ON articles(symbol, published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_fetched ON articles(fetched_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, description ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO articles_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+
+-- Every sector and symbol an article was fetched for; articles.sector/symbol keep the first one
+CREATE TABLE IF NOT EXISTS article_tags (
+    kind TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, tag, article_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_article_tags_article ON article_tags(article_id);
+CREATE TRIGGER IF NOT EXISTS articles_tags_ad AFTER DELETE ON articles BEGIN
+    DELETE FROM article_tags WHERE article_id = old.id;
+END;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    query_key TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    article_count INTEGER NOT NULL
+);
+"""
+
+_FTS_TERM = re.compile(r"[A-Za-z0-9][A-Za-z0-9+-]*")
+_FTS_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+
+def _iso(value: Any) -> str:
+    if isinstance(value, (int, float)) and value:
+        return datetime.fromtimestamp(value, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return str(value or "")
+
+def _fts_query(keywords: str) -> str:
+    """Turn free-text keywords into an FTS5 OR query of quoted terms."""
+    terms = [term for term in _FTS_TERM.findall(keywords or "") if term.upper() not in _FTS_OPERATORS]
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+class ArticleStore:
+    """Persistent article corpus with an FTS5 index, deduplicated by URL.
+
+    Every article the news tools download is recorded here, together with which
+    queries were answered upstream and when. The tools consult the store first
+    and only go upstream when local coverage is missing or stale.
+    """
+
+    def __init__(self, path: str, freshness_seconds: float = 1800, retention_days: float = 7,
+                 max_articles: int = 50000, compact_every: int = 500):
+        self.path = path
+        self.freshness_seconds = freshness_seconds
+        self.retention_days = retention_days
+        self.max_articles = max_articles
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._writes_since_compact = 0
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            has_tags = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_tags'"
+            ).fetchone()
+            conn.executescript(_SCHEMA)
+            if not has_tags:
+                # Corpus from before tags: each article's single sector and symbol become its tags
+                conn.execute("""INSERT OR IGNORE INTO article_tags (kind, tag, article_id)
+                                SELECT 'sector', sector, id FROM articles WHERE sector IS NOT NULL""")
+                conn.execute("""INSERT OR IGNORE INTO article_tags (kind, tag, article_id)
+                                SELECT 'symbol', symbol, id FROM articles WHERE symbol IS NOT NULL""")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_articles(self, articles: List[Dict[str, Any]], origin: str, sector: Optional[str] = None,
+                     symbol: Optional[str] = None, coverage_key: Optional[str] = None) -> int:
+        """Upsert NewsAPI- or yfinance-shaped article dicts and optionally record query coverage.
+
+        sector and symbol are added to the articles' tags; earlier tags are kept.
+        """
+        now = time.time()
+        rows = []
+        for article in articles:
+            url = article.get('url') or article.get('link')
+            if not url or not article.get('title'):
+                continue
+            rows.append((
+                url, article['title'], article.get('description') or '',
+                article.get('source') or article.get('publisher') or '',
+                _iso(article.get('published_at') or article.get('published')),
+                sector.lower() if sector else None, symbol.upper() if symbol else None,
+                article.get('type') or '', origin, now
+            ))
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """INSERT INTO articles (url, title, description, source, published_at, sector, symbol, kind, origin, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       fetched_at = excluded.fetched_at,
+                       sector = COALESCE(articles.sector, excluded.sector),
+                       symbol = COALESCE(articles.symbol, excluded.symbol)""",
+                rows
+            )
+            for kind, tag in (('sector', sector.lower() if sector else None),
+                              ('symbol', symbol.upper() if symbol else None)):
+                if tag:
+                    conn.executemany(
+                        """INSERT OR IGNORE INTO article_tags (kind, tag, article_id)
+                           SELECT ?, ?, id FROM articles WHERE url = ?""",
+                        [(kind, tag, row[0]) for row in rows]
+                    )
+            if coverage_key:
+                conn.execute(
+                    "INSERT OR REPLACE INTO coverage (query_key, fetched_at, article_count) VALUES (?, ?, ?)",
+                    (coverage_key, now, len(rows))
+                )
+        self._maybe_compact(len(rows))
+        return len(rows)
+
+    def has_fresh_coverage(self, coverage_key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT fetched_at FROM coverage WHERE query_key = ?", (coverage_key,)
+        ).fetchone()
+        return row is not None and time.time() - row['fetched_at'] <= self.freshness_seconds
+
+    def search(self, keywords: str = "", sector: Optional[str] = None, symbol: Optional[str] = None,
+               since: Optional[str] = None, fresh_only: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest matching articles. Keywords use the FTS index; sector and symbol match any of an article's tags."""
+        clauses, params = [], []
+        sql = "SELECT a.* FROM articles a"
+        query = _fts_query(keywords)
+        if query:
+            sql += " JOIN articles_fts f ON f.rowid = a.id"
+            clauses.append("articles_fts MATCH ?")
+            params.append(query)
+        for kind, tag in (('sector', sector.lower() if sector else None),
+                          ('symbol', symbol.upper() if symbol else None)):
+            if tag:
+                clauses.append("a.id IN (SELECT article_id FROM article_tags WHERE kind = ? AND tag = ?)")
+                params.extend([kind, tag])
+        if since:
+            clauses.append("a.published_at >= ?")
+            params.append(since)
+        if fresh_only:
+            clauses.append("a.fetched_at >= ?")
+            params.append(time.time() - self.freshness_seconds)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.published_at DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def _maybe_compact(self, written: int):
+        with self._lock:
+            self._writes_since_compact += written
+            if self._writes_since_compact < self.compact_every:
+                return
+            self._writes_since_compact = 0
+        self.compact()
+
+    def compact(self) -> Dict[str, int]:
+        """Apply the retention policy: drop old articles, cap the corpus size, merge FTS segments."""
+        conn = self._connection()
+        cutoff = time.time() - self.retention_days * 86400
+        with conn:
+            expired = conn.execute("DELETE FROM articles WHERE fetched_at < ?", (cutoff,)).rowcount
+            overflow = conn.execute(
+                """DELETE FROM articles WHERE id IN (
+                       SELECT id FROM articles ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_articles,)
+            ).rowcount
+            conn.execute("DELETE FROM coverage WHERE fetched_at < ?", (cutoff,))
+            conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {'expired': expired, 'overflow': overflow}
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        queries = conn.execute("SELECT COUNT(*) FROM coverage").fetchone()[0]
+        return {'path': self.path, 'articles': articles, 'covered_queries': queries,
+                'freshness_seconds': self.freshness_seconds, 'retention_days': self.retention_days,
+                'max_articles': self.max_articles}
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+def get_article_store() -> Optional[ArticleStore]:
+    """Shared store configured from the environment, or None when ARTICLE_STORE_ENABLED=0."""
+    global _store
+    if os.getenv("ARTICLE_STORE_ENABLED", "1") == "0":
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore(
+                    path=os.getenv("ARTICLE_STORE_PATH", "/tmp/news_articles.db"),
+                    freshness_seconds=float(os.getenv("ARTICLE_STORE_FRESHNESS", "1800")),
+                    retention_days=float(os.getenv("ARTICLE_STORE_RETENTION_DAYS", "7")),
+                    max_articles=int(os.getenv("ARTICLE_STORE_MAX_ARTICLES", "50000"))
+                )
+    return _store
@@ -0,0 +1,172 @@
+# tools/dedup.py
+"""Near-duplicate article detection for news tool output.
+
+Syndicated wire stories reach us from several outlets with slightly different
+titles. Articles are shingled into word bigrams of title + description, MinHash
+signatures are bucketed with LSH banding to find candidate pairs, and candidates
+are confirmed with the exact Jaccard similarity of their shingle sets. Each
+cluster collapses into one representative that lists the other outlets.
+
+A tool call returns tens of articles, so signatures are plain Python ints. The
+K hash functions are the shingle hash XORed with K random masks, which keeps
+signing in C (map/min) at about a millisecond per call; the min-wise
+independence this gives up only affects which pairs become candidates, since
+every candidate is verified exactly.
+"""
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Set, Tuple, Union
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "at", "by", "with", "as", "is",
+    "are", "was", "were", "be", "its", "it", "this", "that", "from", "after", "over", "into", "s"
+}
+
+# Rough token cost of text sent to the LLM, used for the savings report
+CHARS_PER_TOKEN = 4
+
+_HASH_MASK = (1 << 61) - 1
+
+def shingles(text: str) -> Set[int]:
+    tokens = [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+    grams = list(zip(tokens, tokens[1:])) or [(token,) for token in tokens]
+    # In-process only, so the salted builtin hash is fine
+    return {hash(gram) & _HASH_MASK for gram in grams}
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _article_text(article: Dict[str, Any]) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+def _article_source(article: Dict[str, Any]) -> str:
+    return article.get('source') or article.get('publisher') or ''
+
+class NearDuplicateDetector:
+    def __init__(self, threshold: float = 0.5, num_perm: int = 32, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._masks = [rng.getrandbits(61) for _ in range(num_perm)]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.articles_in = 0
+        self.articles_removed = 0
+        self.clusters_merged = 0
+        self.tokens_removed = 0
+        self.seconds = 0.0
+
+    def signature(self, shingle_set: Set[int]) -> List[int]:
+        return [min(map(mask.__xor__, shingle_set)) for mask in self._masks]
+
+    def clusters(self, articles: Sequence[Dict[str, Any]]) -> List[List[int]]:
+        """Indexes grouped into near-duplicate clusters, ordered by first member."""
+        shingle_sets = [shingles(_article_text(article)) for article in articles]
+        parent = list(range(len(articles)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: Dict[Tuple, List[int]] = {}
+        for index, shingle_set in enumerate(shingle_sets):
+            if not shingle_set:
+                continue
+            signature = self.signature(shingle_set)
+            for band in range(self.bands):
+                key = (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for other in buckets.setdefault(key, []):
+                    root, other_root = find(index), find(other)
+                    if root != other_root and jaccard(shingle_set, shingle_sets[other]) >= self.threshold:
+                        parent[max(root, other_root)] = min(root, other_root)
+                buckets[key].append(index)
+
+        grouped: Dict[int, List[int]] = {}
+        for index in range(len(articles)):
+            grouped.setdefault(find(index), []).append(index)
+        return sorted(grouped.values(), key=lambda members: members[0])
+
+    @staticmethod
+    def _representative(articles: Sequence[Dict[str, Any]], members: List[int]) -> Dict[str, Any]:
+        # Fullest text wins; ties go to the earliest position (usually the newest or the original wire)
+        best = max(members, key=lambda i: (len(articles[i].get('description') or ''),
+                                           len(articles[i].get('title') or ''), -i))
+        representative = dict(articles[best])
+        sources = []
+        for i in members:
+            source = _article_source(articles[i])
+            if i != best and source and source != _article_source(representative) and source not in sources:
+                sources.append(source)
+        if len(members) > 1:
+            representative['also_reported_by'] = sources
+            representative['duplicates'] = len(members) - 1
+        return representative
+
+    def _collapse(self, articles: List[Dict[str, Any]]) -> List[Tuple[List[int], Dict[str, Any]]]:
+        started = time.perf_counter()
+        collapsed = []
+        removed_chars = 0
+        for members in self.clusters(articles):
+            if len(members) == 1:
+                collapsed.append((members, articles[members[0]]))
+                continue
+            representative = self._representative(articles, members)
+            collapsed.append((members, representative))
+            removed_chars += sum(len(_article_text(articles[i])) for i in members) - len(_article_text(representative))
+        merged = sum(1 for members, _ in collapsed if len(members) > 1)
+        self._record(len(articles), len(articles) - len(collapsed), merged, removed_chars, started)
+        return collapsed
+
+    def dedupe(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One article per near-duplicate cluster, in original order."""
+        return [article for _, article in self._collapse(articles)]
+
+    def dedupe_grouped(self, grouped: Dict[str, Union[List[Dict[str, Any]], str]]) -> Dict[str, Union[List[Dict[str, Any]], str]]:
+        """Dedupe across all groups; a story stays in the group where it first appears.
+
+        String values (per-group errors) pass through.
+        """
+        flat = [(group, article) for group, articles in grouped.items()
+                if not isinstance(articles, str) for article in articles]
+        result = {group: articles if isinstance(articles, str) else [] for group, articles in grouped.items()}
+        for members, article in self._collapse([article for _, article in flat]):
+            result[flat[members[0]][0]].append(article)
+        return result
+
+    def _record(self, articles_in: int, removed: int, merged: int, removed_chars: int, started: float):
+        with self._lock:
+            self.calls += 1
+            self.articles_in += articles_in
+            self.articles_removed += removed
+            self.clusters_merged += merged
+            self.tokens_removed += removed_chars // CHARS_PER_TOKEN
+            self.seconds += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'calls': self.calls,
+                'articles_in': self.articles_in,
+                'articles_removed': self.articles_removed,
+                'clusters_merged': self.clusters_merged,
+                'removed_rate': self.articles_removed / self.articles_in if self.articles_in else 0.0,
+                'tokens_removed_estimate': self.tokens_removed,
+                'avg_ms_per_call': round(self.seconds / self.calls * 1000, 3) if self.calls else 0.0
+            }
+
+def dedup_enabled() -> bool:
+    return os.getenv("DEDUP_ENABLED", "1") == "1"
+
+# Shared by every news tool in the process
+near_duplicates = NearDuplicateDetector(threshold=float(os.getenv("DEDUP_THRESHOLD", "0.5")))
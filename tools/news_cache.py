@@ -0,0 +1,155 @@
+# tools/news_cache.py
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class ResponseCache:
+    """TTL + LRU cache for upstream responses with single-flight coalescing.
+
+    Concurrent callers asking for the same key while a fetch is running wait for
+    that fetch instead of issuing their own upstream request, whichever thread or
+    event loop they run on. Failures are not cached; every waiter receives the
+    exception.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # One thread-safe future per key being fetched, shared by sync and async callers
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+
+    @staticmethod
+    def make_key(namespace: str, params: Dict[str, Any]) -> str:
+        """Normalize query params into a cache key. Secrets and extra whitespace are ignored.
+
+        Case is kept because NewsAPI only treats upper-case AND/OR/NOT as operators.
+        """
+        normalized = {}
+        for name, value in params.items():
+            if name.lower() in ('apikey', 'api_key'):
+                continue
+            if isinstance(value, str):
+                value = " ".join(value.split())
+            normalized[name] = value
+        return f"{namespace}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+    def _lookup_locked(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        return False, None
+
+    def _store_locked(self, key: str, value: Any):
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def peek(self, key: str) -> Tuple[bool, Any]:
+        """(hit, value) without fetching on a miss."""
+        with self._lock:
+            return self._lookup_locked(key)
+
+    def _join_or_lead(self, key: str, refresh: bool = False) -> Tuple[bool, Any, Optional[Future], bool]:
+        """(hit, value, in-flight future, leader). The leader must fetch and then call _finish."""
+        with self._lock:
+            if not refresh:
+                hit, value = self._lookup_locked(key)
+                if hit:
+                    return True, value, None, False
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return False, None, future, False
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            self.upstream_calls += 1
+            return False, None, future, True
+
+    def _finish(self, key: str, future: Future, value: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            if error is None:
+                self._store_locked(key, value)
+            else:
+                self.upstream_errors += 1
+            del self._in_flight[key]
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], refresh: bool = False) -> Any:
+        """Cached value for key, fetching it (once across threads) on a miss or when refresh is set."""
+        hit, value, future, leader = self._join_or_lead(key, refresh)
+        if hit:
+            return value
+        if not leader:
+            return future.result()
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def get_or_fetch_async(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of get_or_fetch; joins fetches started on any thread or event loop."""
+        hit, value, future, leader = self._join_or_lead(key)
+        if hit:
+            return value
+        if not leader:
+            # Shielded so a cancelled waiter does not cancel the fetch others are waiting on
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            size = len(self._entries)
+            in_flight = len(self._in_flight)
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'in_flight': in_flight,
+            'upstream_calls': self.upstream_calls,
+            'upstream_errors': self.upstream_errors,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+# Shared by every crew in the process
+news_response_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("NEWS_CACHE_TTL", "600")),
+    max_entries=int(os.getenv("NEWS_CACHE_SIZE", "512"))
+)
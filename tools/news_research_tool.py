@@ -1,27 +1,55 @@
 # tools/news_research_tool.py
-import requests
+import asyncio
+import httpx
 from crewai_tools import tool
-from typing import List, Dict, Any
+from metrics import instrument_tool
+from rate_limit import UpstreamTimeout, newsapi_limiter, throttle_delay, yahoo_limiter
+from typing import List, Dict, Any, Optional
 import os
 from datetime import datetime, timedelta
-import yfinance as yf
+from tools.news_cache import news_response_cache
+from tools.article_store import ArticleStore, get_article_store
+from tools.article_format import format_articles, format_grouped_articles
+from tools.http_client import get_http_client, get_async_http_client, close_async_http_client
 
-@tool("Financial News Fetcher")
-def get_financial_news(keywords: str = "", category: str = "", limit: int = 10) -> str:
-    """
-    Fetches recent financial news articles based on keywords and category.
-    Parameters:
-    keywords (str): Keywords to search for in news articles.
-    category (str): Category filter (e.g., 'technology', 'healthcare', 'finance').
-    limit (int): Number of articles to return (default: 10).
-    Returns:
-    str: JSON string containing news articles with title, description, url, and published date.
-    """
-    api_key = os.getenv("NEWS_API_KEY")
-    if not api_key:
-        return "News API key not configured. Please set NEWS_API_KEY environment variable."
+# Overridable so benchmarks can point the tools at a local stand-in
+NEWS_API_URL = os.getenv("NEWS_API_URL", 'https://newsapi.org/v2/everything')
+
+SECTOR_KEYWORDS = {
+    'technology': 'technology tech software AI cloud', 'healthcare': 'healthcare pharma biotech medical',
+    'finance': 'finance banking fintech insurance', 'energy': 'energy oil gas renewable solar',
+    'consumer': 'consumer retail e-commerce automotive', 'real_estate': 'real estate REIT property construction',
+    'telecommunications': 'telecom wireless 5G network'
+}
+
+def _parse_everything(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    articles = []
+    for article in data.get('articles', []):
+        if article.get('title') and article.get('description'):
+            articles.append({
+                'title': article['title'], 'description': article['description'],
+                'url': article['url'], 'published_at': article['publishedAt'],
+                'source': article.get('source', {}).get('name', 'Unknown')
+            })
+    return articles
+
+def _request_everything(query_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def request():
+        response = get_http_client().get(NEWS_API_URL, params=query_params)
+        response.raise_for_status()
+        return response
+    return _parse_everything(newsapi_limiter.call(request).json())
+
+async def _request_everything_async(query_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def request():
+        response = await get_async_http_client().get(NEWS_API_URL, params=query_params)
+        response.raise_for_status()
+        return response
+    return _parse_everything((await newsapi_limiter.call_async(request)).json())
+
+def _news_query(keywords: str = "", category: str = "", limit: int = 10) -> Dict[str, Any]:
     query_params = {
-        'apiKey': api_key, 'language': 'en', 'sortBy': 'publishedAt', 'pageSize': limit,
+        'apiKey': os.getenv("NEWS_API_KEY"), 'language': 'en', 'sortBy': 'publishedAt', 'pageSize': limit,
         'from': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
     }
     if keywords:
@@ -30,23 +58,161 @@ def get_financial_news(keywords: str = "", category: str = "", limit: int = 10)
         query_params['q'] = "finance OR stock OR market OR investment"
     if category:
         query_params['q'] += f" AND {category}"
+    return query_params
+
+def _as_news_article(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'title': row['title'], 'description': row['description'], 'url': row['url'],
+        'published_at': row['published_at'], 'source': row['source'] or 'Unknown'
+    }
+
+def _as_stock_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    published = row['published_at']
     try:
-        response = requests.get('https://newsapi.org/v2/everything', params=query_params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        articles = []
-        for article in data.get('articles', []):
-            if article.get('title') and article.get('description'):
-                articles.append({
-                    'title': article['title'], 'description': article['description'],
-                    'url': article['url'], 'published_at': article['publishedAt'],
-                    'source': article.get('source', {}).get('name', 'Unknown')
-                })
-        return str(articles)
-    except requests.exceptions.RequestException as e:
-        return f"Error fetching news: {str(e)}"
+        published = int(datetime.fromisoformat(published.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        pass
+    return {
+        'title': row['title'], 'publisher': row['source'], 'link': row['url'],
+        'providerPublishTime': published, 'type': row['kind']
+    }
+
+def _local_news(store: ArticleStore, key: str, query_params: Dict[str, Any], keywords: str,
+                category: str, sector: Optional[str], limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Answer from the corpus when this query was fetched recently or enough fresh matches exist."""
+    search = {'since': query_params['from'], 'limit': limit}
+    if sector:
+        search['sector'] = sector
+    else:
+        search['keywords'] = f"{keywords} {category}".strip()
+    if store.has_fresh_coverage(key):
+        return [_as_news_article(row) for row in store.search(**search)]
+    if not search.get('sector') and not search.get('keywords'):
+        # Without a filter any fresh articles would match; only this query's own coverage counts
+        return None
+    fresh = store.search(fresh_only=True, **search)
+    if len(fresh) >= limit:
+        return [_as_news_article(row) for row in fresh]
+    return None
+
+def _record(articles: List[Dict[str, Any]], key: str, **tags) -> List[Dict[str, Any]]:
+    store = get_article_store()
+    if store is not None:
+        store.add_articles(articles, coverage_key=key, **tags)
+    return articles
+
+def fetch_financial_news(keywords: str = "", category: str = "", limit: int = 10,
+                         sector: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Local corpus first, then NewsAPI through the shared response cache. Raises httpx.HTTPError.
+
+    refresh=True skips both local layers and always goes upstream, warming them for later callers.
+    """
+    query_params = _news_query(keywords=keywords, category=category, limit=limit)
+    key = news_response_cache.make_key("newsapi.everything", query_params)
+    store = get_article_store()
+    if store is not None and not refresh:
+        local = _local_news(store, key, query_params, keywords, category, sector, limit)
+        if local is not None:
+            return local
+    return news_response_cache.get_or_fetch(
+        key, lambda: _record(_request_everything(query_params), key, origin="newsapi", sector=sector),
+        refresh=refresh
+    )
+
+async def fetch_financial_news_async(keywords: str = "", category: str = "", limit: int = 10,
+                                     sector: Optional[str] = None) -> List[Dict[str, Any]]:
+    query_params = _news_query(keywords=keywords, category=category, limit=limit)
+    key = news_response_cache.make_key("newsapi.everything", query_params)
+    store = get_article_store()
+    if store is not None:
+        local = await asyncio.to_thread(_local_news, store, key, query_params, keywords, category, sector, limit)
+        if local is not None:
+            return local
+
+    async def fetch():
+        articles = await _request_everything_async(query_params)
+        return await asyncio.to_thread(_record, articles, key, origin="newsapi", sector=sector)
+    return await news_response_cache.get_or_fetch_async(key, fetch)
+
+async def fetch_sector_news_async(sectors: List[str], limit: int = 8) -> Dict[str, Any]:
+    """Fetch several sectors concurrently. Failed sectors map to their exception."""
+    results = await asyncio.gather(
+        *(fetch_financial_news_async(keywords=SECTOR_KEYWORDS.get(sector.lower(), sector), limit=limit,
+                                     sector=sector.lower())
+          for sector in sectors),
+        return_exceptions=True
+    )
+    return dict(zip(sectors, results))
+
+def _request_stock_news(stock_symbol: str, key: str) -> List[Dict[str, Any]]:
+    # yfinance pulls in pandas; only pay for it when stock news is actually requested
+    import yfinance as yf
+    news = yahoo_limiter.call(lambda: yf.Ticker(stock_symbol).news) or []
+    return _record(news, key, origin="yfinance", symbol=stock_symbol)
+
+def fetch_stock_news(stock_symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Fetch yfinance news for a ticker, from the local corpus when it was fetched recently."""
+    key = news_response_cache.make_key("yfinance.news", {'symbol': stock_symbol.upper()})
+    store = get_article_store()
+    if store is not None and store.has_fresh_coverage(key):
+        news = [_as_stock_item(row) for row in store.search(symbol=stock_symbol, limit=limit)]
+    else:
+        news = news_response_cache.get_or_fetch(key, lambda: _request_stock_news(stock_symbol, key))
+    articles = []
+    for item in news[:limit]:
+        articles.append({
+            'title': item.get('title', ''), 'publisher': item.get('publisher', ''),
+            'link': item.get('link', ''), 'published': item.get('providerPublishTime', ''),
+            'type': item.get('type', '')
+        })
+    return articles
+
+async def fetch_stock_news_async(stock_symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
+    # yfinance has no async API; keep it off the event loop
+    return await asyncio.to_thread(fetch_stock_news, stock_symbol, limit)
+
+def run_async(coroutine):
+    """Run a coroutine from synchronous tool code and release its loop-bound client."""
+    async def runner():
+        try:
+            return await coroutine
+        finally:
+            await close_async_http_client()
+    return asyncio.run(runner())
+
+def _fetch_error(error: BaseException, subject: str = "news") -> str:
+    if isinstance(error, UpstreamTimeout) or throttle_delay(error) is not None:
+        # Spell it out so the agent reports the gap instead of writing around an error string
+        return ("News service is rate limited right now; no articles are available for this query. "
+                "Do not make up articles.")
+    return f"Error fetching {subject}: {str(error)}"
+
+def _financial_news_result(keywords: str = "", category: str = "", limit: int = 10,
+                           sector: Optional[str] = None) -> str:
+    if not os.getenv("NEWS_API_KEY"):
+        return "News API key not configured. Please set NEWS_API_KEY environment variable."
+    try:
+        return format_articles(fetch_financial_news(keywords=keywords, category=category, limit=limit, sector=sector))
+    except (httpx.HTTPError, UpstreamTimeout) as e:
+        return _fetch_error(e)
+
+@tool("Financial News Fetcher")
+@instrument_tool("get_financial_news")
+def get_financial_news(keywords: str = "", category: str = "", limit: int = 10) -> str:
+    """
+    Fetches recent financial news articles based on keywords and category.
+    Parameters:
+    keywords (str): Keywords to search for in news articles.
+    category (str): Category filter (e.g., 'technology', 'healthcare', 'finance').
+    limit (int): Number of articles to return (default: 10).
+    Returns:
+    str: Compact JSON {"fields": [...], "rows": [...]} with article id, title, source, published date and description.
+    Refer to articles by their id in square brackets, e.g. [a1b2c3d4e5f6a].
+    """
+    return _financial_news_result(keywords=keywords, category=category, limit=limit)
 
 @tool("Stock Market News")
+@instrument_tool("get_stock_specific_news")
 def get_stock_specific_news(stock_symbol: str, limit: int = 5) -> str:
     """
     Fetches news specifically related to a stock symbol.
@@ -54,25 +220,18 @@ def get_stock_specific_news(stock_symbol: str, limit: int = 5) -> str:
     stock_symbol (str): Stock ticker symbol (e.g., 'AAPL', 'TSLA').
     limit (int): Number of articles to return.
     Returns:
-    str: News articles related to the specific stock.
+    str: Compact JSON article rows (same fields as Financial News Fetcher) related to the stock.
     """
     try:
-        ticker = yf.Ticker(stock_symbol)
-        news = ticker.news
-        if not news:
+        articles = fetch_stock_news(stock_symbol, limit=limit)
+        if not articles:
             return f"No recent news found for {stock_symbol}"
-        articles = []
-        for item in news[:limit]:
-            articles.append({
-                'title': item.get('title', ''), 'publisher': item.get('publisher', ''),
-                'link': item.get('link', ''), 'published': item.get('providerPublishTime', ''),
-                'type': item.get('type', '')
-            })
-        return str(articles)
+        return format_articles(articles)
     except Exception as e:
-        return f"Error fetching stock news for {stock_symbol}: {str(e)}"
+        return _fetch_error(e, f"stock news for {stock_symbol}")
 
 @tool("Market Sector News")
+@instrument_tool("get_sector_news")
 def get_sector_news(sector: str, limit: int = 8) -> str:
     """
     Fetches news for a specific market sector.
@@ -80,13 +239,27 @@ def get_sector_news(sector: str, limit: int = 8) -> str:
     sector (str): Market sector (e.g., 'technology', 'healthcare', 'finance').
     limit (int): Number of articles to return.
     Returns:
-    str: News articles related to the sector.
+    str: Compact JSON article rows (same fields as Financial News Fetcher) related to the sector.
     """
-    sector_keywords = {
-        'technology': 'technology tech software AI cloud', 'healthcare': 'healthcare pharma biotech medical',
-        'finance': 'finance banking fintech insurance', 'energy': 'energy oil gas renewable solar',
-        'consumer': 'consumer retail e-commerce automotive', 'real_estate': 'real estate REIT property construction',
-        'telecommunications': 'telecom wireless 5G network'
-    }
-    keywords = sector_keywords.get(sector.lower(), sector)
-    return get_financial_news(keywords=keywords, limit=limit)
+    keywords = SECTOR_KEYWORDS.get(sector.lower(), sector)
+    return _financial_news_result(keywords=keywords, limit=limit, sector=sector.lower())
+
+@tool("Multi-Sector News")
+@instrument_tool("get_multi_sector_news")
+def get_multi_sector_news(sectors: str, limit: int = 5) -> str:
+    """
+    Fetches news for several market sectors at once.
+    Parameters:
+    sectors (str): Comma-separated sectors (e.g., 'technology, healthcare, energy').
+    limit (int): Number of articles to return per sector.
+    Returns:
+    str: Compact JSON article rows (same fields as Financial News Fetcher) keyed by sector.
+    """
+    if not os.getenv("NEWS_API_KEY"):
+        return "News API key not configured. Please set NEWS_API_KEY environment variable."
+    sector_list = [sector.strip() for sector in sectors.split(",") if sector.strip()]
+    results = run_async(fetch_sector_news_async(sector_list, limit=limit))
+    grouped = {}
+    for sector, articles in results.items():
+        grouped[sector] = _fetch_error(articles) if isinstance(articles, Exception) else articles
+    return format_grouped_articles(grouped)
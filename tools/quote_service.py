@@ -0,0 +1,262 @@
+# tools/quote_service.py
+"""Batched, cached stock quotes shared by every agent and request in the process.
+
+Symbols missing from the cache are fetched together in one bulk call per
+QUOTE_MAX_BATCH symbols. Quotes are kept for QUOTE_CACHE_TTL seconds, and
+concurrent callers asking for a symbol that is already being fetched wait for
+that fetch. QUOTE_SOURCE=offline serves quotes from a JSON fixture instead of
+Yahoo Finance, for tests and benchmarks without network access.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rate_limit import yahoo_limiter
+from tools.news_cache import _InFlight
+
+DEFAULT_FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "quotes.json"
+)
+
+@dataclass
+class Quote:
+    symbol: str
+    price: float
+    change: Optional[float] = None
+    change_percent: Optional[float] = None
+    currency: str = "USD"
+    volume: Optional[int] = None
+    fetched_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def parse_symbols(text: str) -> List[str]:
+    """Split 'AAPL, msft TSLA' style input into unique upper-case symbols, keeping order."""
+    symbols = []
+    for symbol in re.split(r"[\s,;]+", text or ""):
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+# Trading currency of Yahoo exchange suffixes; symbols without a suffix trade in USD
+EXCHANGE_CURRENCIES = {
+    "L": "GBp", "IL": "USD", "DE": "EUR", "F": "EUR", "PA": "EUR", "AS": "EUR", "BR": "EUR", "MI": "EUR",
+    "MC": "EUR", "LS": "EUR", "VI": "EUR", "HE": "EUR", "IR": "EUR", "SW": "CHF", "ST": "SEK", "CO": "DKK",
+    "OL": "NOK", "TO": "CAD", "V": "CAD", "NE": "CAD", "T": "JPY", "HK": "HKD", "SS": "CNY", "SZ": "CNY",
+    "KS": "KRW", "KQ": "KRW", "TW": "TWD", "SI": "SGD", "AX": "AUD", "NZ": "NZD", "NS": "INR", "BO": "INR",
+    "SA": "BRL", "MX": "MXN", "JO": "ZAc", "TA": "ILA", "IS": "TRY", "WA": "PLN"
+}
+
+def symbol_currency(symbol: str) -> str:
+    """Trading currency from the Yahoo symbol alone, so bulk quotes need no per-symbol lookup."""
+    symbol = symbol.upper()
+    if symbol.endswith("=X") and len(symbol) == 8:
+        return symbol[3:6]  # FX pair, e.g. EURUSD=X is quoted in USD
+    base, dash, quote = symbol.rpartition("-")
+    if dash and base and len(quote) == 3 and quote.isalpha():
+        return quote  # crypto pair, e.g. BTC-USD
+    _, dot, suffix = symbol.rpartition(".")
+    if dot:
+        return EXCHANGE_CURRENCIES.get(suffix, "USD")
+    return "USD"
+
+class YFinanceQuoteSource:
+    """Daily bars for many symbols through one yf.download call; nothing else is requested per symbol."""
+
+    name = "yfinance"
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Quote]:
+        # yfinance pulls in pandas; import it only once a quote is actually needed
+        import yfinance as yf
+        frame = yahoo_limiter.call(lambda: yf.download(
+            symbols, period="5d", interval="1d", group_by="ticker",
+            auto_adjust=False, progress=False, threads=True
+        ))
+        quotes = {}
+        multi = getattr(frame.columns, "nlevels", 1) > 1
+        for symbol in symbols:
+            try:
+                bars = frame[symbol] if multi else frame
+                closes = bars["Close"].dropna()
+            except KeyError:
+                continue
+            if closes.empty:
+                continue
+            price = float(closes.iloc[-1])
+            change = change_percent = None
+            if len(closes) > 1:
+                previous = float(closes.iloc[-2])
+                change = price - previous
+                change_percent = change / previous * 100 if previous else None
+            volumes = bars["Volume"].dropna()
+            quotes[symbol] = Quote(
+                symbol=symbol,
+                price=round(price, 2),
+                change=round(change, 2) if change is not None else None,
+                change_percent=round(change_percent, 2) if change_percent is not None else None,
+                currency=symbol_currency(symbol),
+                volume=int(volumes.iloc[-1]) if not volumes.empty else None
+            )
+        return quotes
+
+class OfflineQuoteSource:
+    """Quotes from a {symbol: {price, change, change_percent, currency, volume}} mapping."""
+
+    name = "offline"
+
+    def __init__(self, quotes: Dict[str, Dict[str, Any]], latency_seconds: float = 0.0):
+        self.quotes = {symbol.upper(): values for symbol, values in quotes.items()}
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path: str, latency_seconds: float = 0.0) -> "OfflineQuoteSource":
+        with open(path) as f:
+            return cls(json.load(f), latency_seconds)
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Quote]:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return {
+            symbol: Quote(symbol=symbol, **self.quotes[symbol])
+            for symbol in symbols if symbol in self.quotes
+        }
+
+def create_quote_source():
+    if os.getenv("QUOTE_SOURCE", "yfinance") == "offline":
+        return OfflineQuoteSource.from_file(
+            os.getenv("QUOTE_FIXTURE_PATH", DEFAULT_FIXTURE_PATH),
+            latency_seconds=float(os.getenv("QUOTE_OFFLINE_LATENCY", "0"))
+        )
+    return YFinanceQuoteSource()
+
+class QuoteService:
+    """TTL + LRU quote cache in front of a bulk quote source.
+
+    Unknown symbols are cached as None for the same TTL so agents retrying a bad
+    ticker do not hit the source again. A failed bulk fetch is not cached; the
+    affected symbols come back as None.
+    """
+
+    def __init__(self, source=None, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_batch: Optional[int] = None):
+        self.source = source or create_quote_source()
+        self.ttl_seconds = ttl_seconds or float(os.getenv("QUOTE_CACHE_TTL", "60"))
+        self.max_entries = max_entries or int(os.getenv("QUOTE_CACHE_SIZE", "1024"))
+        self.max_batch = max_batch or int(os.getenv("QUOTE_MAX_BATCH", "50"))
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Quote]]]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.symbols_fetched = 0
+        self.upstream_errors = 0
+
+    def _lookup_locked(self, symbol: str) -> Tuple[bool, Optional[Quote]]:
+        entry = self._entries.get(symbol)
+        if entry is not None:
+            expires_at, quote = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return True, quote
+            del self._entries[symbol]
+        return False, None
+
+    def _store_locked(self, symbol: str, quote: Optional[Quote]):
+        self._entries[symbol] = (time.time() + self.ttl_seconds, quote)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _fetch_batch(self, symbols: List[str], flights: Dict[str, _InFlight]):
+        try:
+            fetched = self.source.fetch(symbols)
+        except Exception as e:
+            print(f"Error fetching quotes for {', '.join(symbols)}: {e}")
+            with self._lock:
+                self.upstream_errors += 1
+                for symbol in symbols:
+                    del self._in_flight[symbol]
+            for symbol in symbols:
+                flights[symbol].event.set()
+            return
+        with self._lock:
+            self.batches += 1
+            self.symbols_fetched += len(symbols)
+            for symbol in symbols:
+                self._store_locked(symbol, fetched.get(symbol))
+                del self._in_flight[symbol]
+        for symbol in symbols:
+            flights[symbol].value = fetched.get(symbol)
+            flights[symbol].event.set()
+
+    def get_quotes(self, symbols: Iterable[str], refresh: bool = False) -> Dict[str, Optional[Quote]]:
+        """Quote (or None when unavailable) per symbol, in the order requested."""
+        symbols = parse_symbols(" ".join(symbols))
+        results: Dict[str, Optional[Quote]] = {}
+        waiting: Dict[str, _InFlight] = {}
+        leading: Dict[str, _InFlight] = {}
+        with self._lock:
+            for symbol in symbols:
+                if not refresh:
+                    hit, quote = self._lookup_locked(symbol)
+                    if hit:
+                        results[symbol] = quote
+                        continue
+                in_flight = self._in_flight.get(symbol)
+                if in_flight is not None:
+                    self.coalesced += 1
+                    waiting[symbol] = in_flight
+                else:
+                    in_flight = self._in_flight[symbol] = _InFlight()
+                    self.misses += 1
+                    leading[symbol] = in_flight
+
+        to_fetch = list(leading)
+        for start in range(0, len(to_fetch), self.max_batch):
+            self._fetch_batch(to_fetch[start:start + self.max_batch], leading)
+        for symbol, in_flight in {**leading, **waiting}.items():
+            in_flight.event.wait()
+            results[symbol] = in_flight.value
+        return {symbol: results.get(symbol) for symbol in symbols}
+
+    def get_quote(self, symbol: str, refresh: bool = False) -> Optional[Quote]:
+        return self.get_quotes([symbol], refresh=refresh).get(symbol.strip().upper())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+            in_flight = len(self._in_flight)
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'source': self.source.name,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'in_flight': in_flight,
+            'batches': self.batches,
+            'symbols_fetched': self.symbols_fetched,
+            'upstream_errors': self.upstream_errors,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+# Shared by the analyst and trader agents and every request in the process
+quote_service = QuoteService()
@@ -1,7 +1,20 @@
-import yfinance as yf
 from crewai_tools import tool
+from metrics import instrument_tool
+from tools.quote_service import Quote, parse_symbols, quote_service
+
+def format_quote(symbol: str, quote: Quote) -> str:
+    change_percent = f"{round(quote.change_percent, 2)}%" if quote.change_percent is not None else "n/a"
+    lines = [
+        f"Stock: {symbol.upper()}",
+        f"Price: {quote.price} {quote.currency}",
+        f"Change: {quote.change} ({change_percent})"
+    ]
+    if quote.volume is not None:
+        lines.append(f"Volume: {quote.volume}")
+    return "\n".join(lines)
 
 @tool("Live Stock Information Tool")
+@instrument_tool("get_stock_price")
 def get_stock_price(stock_symbol: str) -> str:
     """
     Retrieves the latest stock price and other relevant info for a given stock symbol using Yahoo Finance.
@@ -12,19 +25,33 @@ def get_stock_price(stock_symbol: str) -> str:
     Returns:
         str: A summary of the stock's current price, daily change, and other key data.
     """
-    stock = yf.Ticker(stock_symbol)
-    info = stock.info
-
-    current_price = info.get("regularMarketPrice")
-    change = info.get("regularMarketChange")
-    change_percent = info.get("regularMarketChangePercent")
-    currency = info.get("currency", "USD")
+    quote = quote_service.get_quote(stock_symbol)
 
-    if current_price is None:
+    if quote is None:
         return f"Could not fetch price for {stock_symbol}. Please check the symbol."
 
-    return (
-        f"Stock: {stock_symbol.upper()}\n"
-        f"Price: {current_price} {currency}\n"
-        f"Change: {change} ({round(change_percent, 2)}%)"
+    return format_quote(stock_symbol, quote)
+
+@tool("Multi-Stock Information Tool")
+@instrument_tool("get_stock_prices")
+def get_stock_prices(stock_symbols: str) -> str:
+    """
+    Retrieves the latest price, daily change and volume for several stock symbols in one call.
+    Prefer this over repeated single-symbol lookups when comparing stocks.
+
+    Parameters:
+        stock_symbols (str): Comma-separated ticker symbols (e.g., "AAPL, MSFT, NVDA").
+
+    Returns:
+        str: One summary block per symbol.
+    """
+    symbols = parse_symbols(stock_symbols)
+    if not symbols:
+        return "No stock symbols given."
+
+    quotes = quote_service.get_quotes(symbols)
+    return "\n\n".join(
+        format_quote(symbol, quote) if quote is not None
+        else f"Could not fetch price for {symbol}. Please check the symbol."
+        for symbol, quote in quotes.items()
     )
@@ -1,9 +1,14 @@
 # user_profile.py
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
-import json
+import hashlib
 import os
+import threading
+from profile_store import create_profile_store
+
+# Location of the original whole-file JSON store; imported into SQLite on first start
+LEGACY_PROFILES_PATH = "/tmp/user_profiles.json"
 
 class InvestmentFrequency(Enum):
     DAILY = "daily"
@@ -50,6 +55,21 @@ class UserProfile:
             'experience_level': self.experience_level.value
         }
     
+    def cohort_key(self) -> Tuple[str, ...]:
+        """Canonical tuple of the fields that shape the crew prompts."""
+        industries = ",".join(sorted({industry.lower() for industry in self.industry_preferences}))
+        return (
+            industries,
+            self.investment_horizon.value,
+            self.risk_appetite.value,
+            self.experience_level.value,
+            self.investment_frequency.value
+        )
+    
+    def fingerprint(self) -> str:
+        """Stable hash of cohort_key(); users with equal fingerprints get the same digest."""
+        return hashlib.sha256("|".join(self.cohort_key()).encode("utf-8")).hexdigest()[:16]
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'UserProfile':
         return cls(
@@ -64,34 +84,12 @@ class UserProfile:
 
 class UserProfileManager:
     # Use the /tmp directory for writable storage in Vercel
-    def __init__(self, storage_path: str = "/tmp/user_profiles.json"):
-        self.storage_path = storage_path
-        self.profiles = self._load_profiles()
-    
-    def _load_profiles(self) -> Dict[str, UserProfile]:
-        # Create the file if it doesn't exist
-        if not os.path.exists(self.storage_path):
-            with open(self.storage_path, 'w') as f:
-                json.dump({}, f)
-            return {}
-        
-        try:
-            with open(self.storage_path, 'r') as f:
-                data = json.load(f)
-                return {
-                    user_id: UserProfile.from_dict(profile_data)
-                    for user_id, profile_data in data.items()
-                }
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+    def __init__(self, storage_path: Optional[str] = None, legacy_json_path: str = LEGACY_PROFILES_PATH):
+        self.storage_path = storage_path or os.getenv("PROFILE_STORAGE_PATH", "/tmp/user_profiles.db")
+        self.store = create_profile_store(self.storage_path, legacy_json_path=legacy_json_path)
     
-    def _save_profiles(self):
-        data = {
-            user_id: profile.to_dict()
-            for user_id, profile in self.profiles.items()
-        }
-        with open(self.storage_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _save_profile(self, profile: UserProfile):
+        self.store.upsert(profile.user_id, profile.to_dict())
     
     def create_profile(self, user_id: str, responses: Dict[str, Any]) -> UserProfile:
         """Create user profile from questionnaire responses"""
@@ -105,25 +103,41 @@ class UserProfileManager:
             experience_level=ExperienceLevel(responses['experience'])
         )
         
-        self.profiles[user_id] = profile
-        self._save_profiles()
+        self._save_profile(profile)
         return profile
     
     def get_profile(self, user_id: str) -> UserProfile:
-        return self.profiles.get(user_id)
+        data = self.store.get(user_id)
+        return UserProfile.from_dict(data) if data else None
+    
+    def list_profiles(self) -> List[UserProfile]:
+        """Every stored profile; reads and deserializes the whole store."""
+        return [UserProfile.from_dict(data) for data in self.store.all()]
     
     def update_profile(self, user_id: str, updates: Dict[str, Any]) -> UserProfile:
-        if user_id not in self.profiles:
+        profile = self.get_profile(user_id)
+        if profile is None:
             raise ValueError(f"Profile for user {user_id} not found")
         
-        profile = self.profiles[user_id]
         for key, value in updates.items():
             if hasattr(profile, key):
                 setattr(profile, key, value)
         
-        self._save_profiles()
+        self._save_profile(profile)
         return profile
 
+_profile_manager: Optional[UserProfileManager] = None
+_profile_manager_lock = threading.Lock()
+
+def get_profile_manager() -> UserProfileManager:
+    """The process-wide UserProfileManager shared by the API and the questionnaire."""
+    global _profile_manager
+    if _profile_manager is None:
+        with _profile_manager_lock:
+            if _profile_manager is None:
+                _profile_manager = UserProfileManager()
+    return _profile_manager
+
 # Industry mapping for news filtering
 INDUSTRY_KEYWORDS = {
     'technology': ['tech', 'software', 'AI', 'artificial intelligence', 'cloud', 'cybersecurity', 'semiconductor'],
@@ -132,5 +146,8 @@ INDUSTRY_KEYWORDS = {
     'energy': ['oil', 'gas', 'renewable', 'solar', 'wind', 'energy', 'utilities'],
     'consumer': ['retail', 'consumer', 'e-commerce', 'brand', 'restaurant', 'automotive'],
     'real_estate': ['real estate', 'REIT', 'property', 'construction', 'housing'],
-    'telecommunications': ['telecom', 'wireless', '5G', 'network', 'infrastructure']
+    'telecommunications': ['telecom', 'wireless', '5G', 'network', 'infrastructure'],
+    'manufacturing': ['manufacturing', 'industrial', 'factory', 'machinery', 'supply chain', 'steel'],
+    'aerospace': ['aerospace', 'defense', 'aircraft', 'airline', 'satellite', 'missile'],
+    'media': ['media', 'entertainment', 'streaming', 'advertising', 'film', 'gaming']
 }
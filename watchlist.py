@@ -0,0 +1,212 @@
+# watchlist.py
+"""Analyse a watchlist of tickers with the legacy stock crew, several at a time.
+
+Each ticker runs on its own copy of crew.stock_crew (kickoff interpolates {stock}
+into the shared task objects, so one instance cannot serve two tickers at once).
+A shared pool caps concurrent crew runs across all callers, per-ticker results
+are cached for WATCHLIST_CACHE_TTL seconds, and results are yielded as each
+ticker finishes.
+
+Usage:
+    python watchlist.py AAPL MSFT NVDA --concurrency 4 --output /tmp/watchlist.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from metrics import complete_stage, track_crew
+from tools.news_cache import ResponseCache
+from tools.quote_service import parse_symbols, quote_service
+
+# Names of the stock crew's tasks, in order, for per-stage metrics
+STOCK_STAGES = ("analysis", "decision")
+
+@dataclass
+class TickerAnalysis:
+    ticker: str
+    analysis: Optional[str] = None
+    decision: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    analyzed_at: Optional[float] = None
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class WatchlistReport:
+    tickers: int = 0
+    completed: int = 0
+    cached: int = 0
+    failed: int = 0
+    started_at: float = 0.0
+
+    def __post_init__(self):
+        self.started_at = self.started_at or time.time()
+
+    def record(self, result: TickerAnalysis):
+        self.completed += 1
+        if result.cached:
+            self.cached += 1
+        if result.error:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = time.time() - self.started_at
+        analysed = self.completed - self.cached
+        return {
+            'tickers': self.tickers,
+            'completed': self.completed,
+            'cached': self.cached,
+            'failed': self.failed,
+            'elapsed_seconds': round(elapsed, 2),
+            'tickers_per_minute': round(self.completed / elapsed * 60, 2) if elapsed else 0.0,
+            # Crew throughput, excluding cache hits; this is the number to size workers by
+            'analyses_per_minute': round(analysed / elapsed * 60, 2) if elapsed else 0.0
+        }
+
+def run_stock_crew(ticker: str) -> Dict[str, str]:
+    from crew import get_stock_crew, task_output_text
+    from llm_cache import llm_cache_bypass
+    stock_crew = get_stock_crew().copy()
+    for stage, task in zip(STOCK_STAGES, stock_crew.tasks):
+        task.callback = lambda output, stage=stage: complete_stage(stage)
+    # The analyst works from live quotes and news, so its answers must not be replayed
+    with track_crew("stock", STOCK_STAGES), llm_cache_bypass():
+        decision = stock_crew.kickoff(inputs={"stock": ticker})
+    return {
+        'analysis': task_output_text(stock_crew.tasks[0].output),
+        'decision': task_output_text(decision)
+    }
+
+class WatchlistAnalyzer:
+    def __init__(self, runner: Optional[Callable[[str], Dict[str, str]]] = None,
+                 max_concurrency: Optional[int] = None, cache_ttl: Optional[float] = None,
+                 max_tickers: Optional[int] = None):
+        self.runner = runner or run_stock_crew
+        self.max_concurrency = max_concurrency or int(os.getenv("WATCHLIST_CONCURRENCY", "4"))
+        self.max_tickers = max_tickers or int(os.getenv("WATCHLIST_MAX_TICKERS", "50"))
+        self.cache = ResponseCache(
+            ttl_seconds=cache_ttl or float(os.getenv("WATCHLIST_CACHE_TTL", "900")),
+            max_entries=int(os.getenv("WATCHLIST_CACHE_SIZE", "512"))
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="watchlist")
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.run_seconds = 0.0
+
+    def _fetch(self, ticker: str) -> Dict[str, Any]:
+        started = time.time()
+        try:
+            return {**self.runner(ticker), 'analyzed_at': time.time()}
+        finally:
+            with self._lock:
+                self.runs += 1
+                self.run_seconds += time.time() - started
+
+    def _analyze(self, ticker: str) -> TickerAnalysis:
+        started = time.time()
+        try:
+            # Coalesces with another request already analysing the same ticker
+            result = self.cache.get_or_fetch(ticker, lambda: self._fetch(ticker))
+        except Exception as e:
+            print(f"Error analysing {ticker}: {e}")
+            with self._lock:
+                self.failures += 1
+            return TickerAnalysis(ticker=ticker, error=str(e), seconds=time.time() - started)
+        return TickerAnalysis(
+            ticker=ticker, analysis=result['analysis'], decision=result['decision'],
+            analyzed_at=result['analyzed_at'], seconds=time.time() - started
+        )
+
+    def analyze(self, tickers: Iterable[str], idle_timeout: Optional[float] = None) -> Iterator[Optional[TickerAnalysis]]:
+        """Yield a TickerAnalysis per ticker as it finishes, cache hits first.
+
+        With idle_timeout set, None is yielded whenever nothing finished for that
+        many seconds so streaming callers can send keep-alives. Closing the
+        iterator early cancels tickers that have not started yet.
+        """
+        symbols = parse_symbols(" ".join(tickers))
+        if len(symbols) > self.max_tickers:
+            raise ValueError(f"Watchlist has {len(symbols)} tickers, the limit is {self.max_tickers}")
+
+        pending = []
+        for symbol in symbols:
+            hit, result = self.cache.peek(symbol)
+            if hit:
+                yield TickerAnalysis(
+                    ticker=symbol, analysis=result['analysis'], decision=result['decision'],
+                    cached=True, analyzed_at=result['analyzed_at']
+                )
+            else:
+                pending.append(symbol)
+        if not pending:
+            return
+
+        # One bulk quote fetch up front; the agents' price lookups then hit the quote cache
+        quote_service.get_quotes(pending)
+        futures = {self._executor.submit(self._analyze, symbol) for symbol in pending}
+        try:
+            while futures:
+                done, futures = wait(futures, timeout=idle_timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield None
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            runs, failures, run_seconds = self.runs, self.failures, self.run_seconds
+        average = run_seconds / runs if runs else None
+        return {
+            'max_concurrency': self.max_concurrency,
+            'runs': runs,
+            'failures': failures,
+            'avg_run_seconds': round(average, 2) if average else None,
+            # Steady-state ceiling for uncached tickers with every worker busy
+            'capacity_tickers_per_minute': round(self.max_concurrency * 60 / average, 2) if average else None,
+            'cache': self.cache.stats()
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Run the stock analysis crew over a watchlist")
+    parser.add_argument("tickers", nargs="+", help="Ticker symbols, space or comma separated")
+    parser.add_argument("--concurrency", type=int, help="Crews run at once (default: WATCHLIST_CONCURRENCY)")
+    parser.add_argument("--output", help="Write results and the summary as JSON to this file")
+    args = parser.parse_args()
+    load_dotenv()
+
+    analyzer = WatchlistAnalyzer(max_concurrency=args.concurrency)
+    tickers = parse_symbols(" ".join(args.tickers))
+    report = WatchlistReport(tickers=len(tickers))
+    results: List[Dict[str, Any]] = []
+    try:
+        for result in analyzer.analyze(tickers):
+            report.record(result)
+            results.append(result.to_dict())
+            status = "failed" if result.error else f"{result.seconds:.1f}s"
+            print(f"[{report.completed}/{report.tickers}] {result.ticker} ({status})")
+    finally:
+        analyzer.shutdown()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': report.summary(), 'results': results}, f, indent=2)
+    print(json.dumps(report.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# workers.py
+"""Multi-worker serving.
+
+`python main.py` starts WEB_CONCURRENCY uvicorn worker processes ("auto" = one
+per core). Workers share all state through the SQLite stores under /tmp:
+profiles, digests and digest jobs, plus the LLM, summary and article caches.
+That lets any worker answer any request. Per-process pieces are sized for the
+pool:
+
+    - upstream rate limits (rate_limit.py) are split evenly between workers
+    - host-wide background duties (sector ingestion, digest precompute) run
+      only in the worker holding the background HostLock
+
+/metrics and /cache/stats describe the worker that answered.
+"""
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, assume a single worker
+    fcntl = None
+
+def web_concurrency() -> int:
+    """Number of uvicorn worker processes from WEB_CONCURRENCY (default 1, "auto" = cpu count)."""
+    value = os.getenv("WEB_CONCURRENCY", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+class HostLock:
+    """Exclusive, non-blocking flock on a file under /tmp, held until release or process exit.
+
+    The kernel drops the lock when its holder dies, so a restarted worker can take over.
+    """
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        directory = directory or os.getenv("HOST_LOCK_DIR", "/tmp")
+        self.path = os.path.join(directory, f"newsvault-{name}.lock")
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            return True
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None